@@ -1,14 +1,49 @@
 """Command-line interface for RAG system."""
 import argparse
+import io
 import json
+import logging
+import sys
+import textwrap
+from collections import Counter
+from operator import attrgetter
 from pathlib import Path
 from typing import Optional
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 from src.rag_system import RAGSystem
+from src.cache.semantic_cache import SemanticCache
 from src.config import settings
 from src.utils.logger import logger
 
 
+def write_json(data: dict, indent: bool = False) -> None:
+    """Write a JSON document to stdout, one line per document unless indented."""
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        sys.stdout.buffer.write(orjson.dumps(data, option=option) + b"\n")
+    else:
+        sys.stdout.write(json.dumps(data, indent=2 if indent else None) + "\n")
+
+
+def build_semantic_cache(rag: RAGSystem) -> SemanticCache:
+    """Create a semantic cache that reuses the retriever's embedding model."""
+    return SemanticCache(
+        rag.retriever.embedding_model,
+        threshold=settings.semantic_cache_threshold,
+        ttl=settings.semantic_cache_ttl,
+        max_entries=settings.semantic_cache_max_entries,
+        redis_url=settings.redis_url,
+        index_fingerprint=rag.retriever.index_fingerprint,
+        encode_fn=rag.retriever.encode_batch
+    )
+
+
 def init_command(args):
     """Initialize and build the index from repository."""
     logger.info("Initializing RAG system...")
@@ -25,10 +60,7 @@ def init_command(args):
     logger.info(f"✓ Index saved to {settings.faiss_index_path}")
 
     # Print statistics
-    language_stats = {}
-    for chunk in chunks:
-        lang = chunk.language
-        language_stats[lang] = language_stats.get(lang, 0) + 1
+    language_stats = dict(Counter(map(attrgetter("language"), chunks)))
 
     print("\nIngestion Summary:")
     print(f"  Total chunks: {len(chunks)}")
@@ -45,50 +77,70 @@ def search_command(args):
 
     rag = RAGSystem()
     try:
-        rag.load_existing_index()
+        rag.load_existing_index(mmap=args.mmap)
     except Exception as e:
         logger.error(f"Failed to load index: {e}")
         return
 
-    results = rag.search(
-        query,
-        expand_query=not args.no_expansion,
-        include_context=not args.no_context,
-        top_k=top_k
-    )
+    search_kwargs = {
+        "expand_query": not args.no_expansion,
+        "include_context": not args.no_context,
+        "top_k": top_k
+    }
+    if args.no_cache:
+        results = rag.search(query, **search_kwargs)
+    else:
+        results = build_semantic_cache(rag).search(rag, query, **search_kwargs)
+
+    if args.json:
+        # One JSON object per result (NDJSON) for downstream tooling
+        for result in results:
+            chunk = result.ranked_result.result.chunk
+            write_json({
+                "file": chunk.file_path,
+                "score": result.ranked_result.final_score,
+                "lines": [chunk.start_line, chunk.end_line],
+                "function": chunk.function_name,
+                "class": chunk.class_name,
+                "preview": chunk.content[:300]
+            })
+        return
 
     if not results:
         print("No results found.")
         return
 
-    print(f"\n{'='*80}")
-    print(f"Found {len(results)} relevant code chunks for: {query}")
-    print(f"{'='*80}\n")
+    # Build the whole report and write it once instead of printing line by line
+    buf = io.StringIO()
+    buf.write(f"\n{'='*80}\n")
+    buf.write(f"Found {len(results)} relevant code chunks for: {query}\n")
+    buf.write(f"{'='*80}\n\n")
 
     for i, result in enumerate(results, 1):
         chunk = result.ranked_result.result.chunk
         score = result.ranked_result.final_score
 
-        print(f"\n[{i}] {chunk.file_path} (Score: {score:.3f})")
-        print(f"    Lines: {chunk.start_line}-{chunk.end_line}")
+        buf.write(f"\n[{i}] {chunk.file_path} (Score: {score:.3f})\n")
+        buf.write(f"    Lines: {chunk.start_line}-{chunk.end_line}\n")
 
         if chunk.function_name:
-            print(f"    Function: {chunk.function_name}")
+            buf.write(f"    Function: {chunk.function_name}\n")
         if chunk.class_name:
-            print(f"    Class: {chunk.class_name}")
+            buf.write(f"    Class: {chunk.class_name}\n")
 
-        print("\n    Code Preview:")
+        buf.write("\n    Code Preview:\n")
         preview = chunk.content[:300]
-        for line in preview.split("\n"):
-            print(f"      {line}")
+        buf.write(textwrap.indent(preview, "      ", lambda line: True) + "\n")
 
         if result.commit_context:
-            print(f"\n    Last Modified:")
-            print(f"      {result.commit_context.author}")
-            print(f"      {result.commit_context.date}")
-            print(f"      {result.commit_context.message[:80]}...")
+            buf.write("\n    Last Modified:\n")
+            buf.write(f"      {result.commit_context.author}\n")
+            buf.write(f"      {result.commit_context.date}\n")
+            buf.write(f"      {result.commit_context.message[:80]}...\n")
 
-        print("\n" + "-"*80)
+        buf.write("\n" + "-"*80 + "\n")
+
+    sys.stdout.write(buf.getvalue())
 
 
 def status_command(args):
@@ -114,8 +166,7 @@ def status_command(args):
 def config_command(args):
     """Show or update configuration."""
     if args.list:
-        print("\nCurrent Configuration:")
-        print(json.dumps({
+        config = {
             "openai_api_key": "***" if settings.openai_api_key else "not set",
             "llm_model": settings.llm_model,
             "embedding_model": settings.embedding_model,
@@ -125,14 +176,25 @@ def config_command(args):
             "top_k_retrieval": settings.top_k_retrieval,
             "top_k_ranking": settings.top_k_ranking,
             "reranker_model": settings.reranker_model,
+            "reranker_backend": settings.reranker_backend,
+            "reranker_quantization": settings.reranker_quantization,
             "repo_path": str(settings.repo_path),
             "included_extensions": settings.included_extensions,
             "excluded_patterns": settings.excluded_patterns_list
-        }, indent=2))
+        }
 
+        if args.json:
+            write_json(config)
+            return
 
-def interactive_search(rag: RAGSystem):
+        print("\nCurrent Configuration:")
+        write_json(config, indent=True)
+
+
+def interactive_search(rag: RAGSystem, cache: Optional[SemanticCache] = None):
     """Interactive search mode."""
+    cache = cache or build_semantic_cache(rag)
+
     print("\n" + "="*80)
     print("RAG System - Interactive Search")
     print("Type 'quit' or 'exit' to exit, 'help' for commands")
@@ -158,23 +220,26 @@ def interactive_search(rag: RAGSystem):
 
             if query.lower() == "status":
                 info = rag.get_system_info()
+                cache_stats = cache.get_stats()
                 print(f"Index loaded: {info['index_loaded']}")
                 print(f"Chunks: {info['index_size']}")
+                print(f"Cache: {cache_stats['entries']} entries, {cache_stats['hits']} hits")
                 continue
 
             if not query.strip():
                 continue
 
-            results = rag.search(query, top_k=5)
+            results = cache.search(rag, query, top_k=5)
 
             if not results:
                 print("No results found.")
             else:
-                print(f"\nFound {len(results)} results:\n")
+                lines = [f"\nFound {len(results)} results:\n"]
                 for i, result in enumerate(results, 1):
                     chunk = result.ranked_result.result.chunk
                     score = result.ranked_result.final_score
-                    print(f"{i}. {chunk.file_path} (score: {score:.3f})")
+                    lines.append(f"{i}. {chunk.file_path} (score: {score:.3f})")
+                sys.stdout.write("\n".join(lines) + "\n")
 
         except KeyboardInterrupt:
             print("\nExiting...")
@@ -223,6 +288,22 @@ def main():
         action="store_true",
         help="Disable git context enrichment"
     )
+    search_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypass the semantic response cache"
+    )
+    search_parser.add_argument(
+        "--mmap",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="Memory-map the FAISS index (default: FAISS_MMAP setting)"
+    )
+    search_parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Emit one JSON object per result (NDJSON)"
+    )
     search_parser.set_defaults(func=search_command)
 
     # Status command
@@ -242,6 +323,11 @@ def main():
         action="store_true",
         help="List all configuration values"
     )
+    config_parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Emit configuration as a single-line JSON object"
+    )
     config_parser.set_defaults(func=config_command)
 
     # Interactive command
@@ -249,11 +335,17 @@ def main():
         "interactive",
         help="Start interactive search mode"
     )
+    interactive_parser.add_argument(
+        "--mmap",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="Memory-map the FAISS index (default: FAISS_MMAP setting)"
+    )
 
     def interactive_command(args):
         rag = RAGSystem()
         try:
-            rag.load_existing_index()
+            rag.load_existing_index(mmap=args.mmap)
         except Exception as e:
             logger.error(f"Failed to load index: {e}")
             return
@@ -268,6 +360,12 @@ def main():
         parser.print_help()
         return
 
+    if getattr(args, "json", False):
+        # Keep stdout clean for machine-readable output
+        for handler in logger.handlers:
+            if isinstance(handler, logging.StreamHandler) and handler.stream is sys.stdout:
+                handler.setStream(sys.stderr)
+
     args.func(args)
 
 
@@ -65,7 +65,8 @@ def example_advanced_search():
         keyword_results = KeywordRetriever.search(
             query,
             rag.retriever.chunk_map,
-            k=5
+            k=5,
+            index=rag.retriever.keyword_index
         )
         logger.info("Top keyword matches:")
         for i, result in enumerate(keyword_results, 1):
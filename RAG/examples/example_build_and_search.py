@@ -1,5 +1,6 @@
 """Example: Building and searching a repository."""
 from pathlib import Path
+from cli import build_semantic_cache
 from src.rag_system import RAGSystem
 from src.utils.logger import logger
 
@@ -22,6 +23,9 @@ def example_build_and_search():
         logger.error(f"Failed to build index: {e}")
         return
 
+    # Repeated or paraphrased queries are served from the semantic cache
+    cache = build_semantic_cache(rag)
+
     # Perform searches
     queries = [
         "authentication and authorization",
@@ -32,30 +36,34 @@ def example_build_and_search():
     ]
 
     logger.info("\n2. Performing searches...")
-    for query in queries:
-        logger.info(f"\n  Query: {query}")
-        try:
-            results = rag.search(
-                query,
-                expand_query=True,
-                include_context=True,
-                top_k=3
-            )
+    try:
+        # One batched pass: shared embedding, FAISS search and re-ranking
+        batch_results = cache.search_batch(
+            rag,
+            queries,
+            expand_query=True,
+            include_context=True,
+            top_k=3
+        )
+    except Exception as e:
+        logger.error(f"  Search failed: {e}")
+        batch_results = [[] for _ in queries]
 
-            if results:
-                logger.info(f"  Found {len(results)} results")
-                for i, result in enumerate(results, 1):
-                    chunk = result.ranked_result.result.chunk
-                    score = result.ranked_result.final_score
-                    logger.info(f"    [{i}] {chunk.file_path} (score: {score:.3f})")
-            else:
-                logger.info("  No results found")
-        except Exception as e:
-            logger.error(f"  Search failed: {e}")
+    for query, results in zip(queries, batch_results):
+        logger.info(f"\n  Query: {query}")
+        if results:
+            logger.info(f"  Found {len(results)} results")
+            for i, result in enumerate(results, 1):
+                chunk = result.ranked_result.result.chunk
+                score = result.ranked_result.final_score
+                logger.info(f"    [{i}] {chunk.file_path} (score: {score:.3f})")
+        else:
+            logger.info("  No results found")
 
     # Get system info
     logger.info("\n3. System Information")
     info = rag.get_system_info()
+    info["semantic_cache"] = cache.get_stats()
     for key, value in info.items():
         logger.info(f"  {key}: {value}")
 
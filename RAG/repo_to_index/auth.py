@@ -1,4 +1,12 @@
 """Authentication module for handling user authentication."""
+import hashlib
+import hmac
+import os
+from types import MappingProxyType
+from typing import Final, Mapping, Optional
+
+
+PBKDF2_ITERATIONS = 100_000
 
 
 class AuthenticationError(Exception):
@@ -6,6 +14,22 @@ class AuthenticationError(Exception):
     pass
 
 
+def hash_password(password: str, salt: Optional[bytes] = None) -> str:
+    """
+    Hash a password with PBKDF2-SHA256.
+    
+    Args:
+        password: The plaintext password
+        salt: Optional salt (random if not provided)
+        
+    Returns:
+        Hash string in the form "salt_hex$digest_hex"
+    """
+    salt = salt or os.urandom(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, PBKDF2_ITERATIONS)
+    return f"{salt.hex()}${digest.hex()}"
+
+
 def verify_password(password: str, hashed: str) -> bool:
     """
     Verify a password against its hash.
@@ -17,8 +41,23 @@ def verify_password(password: str, hashed: str) -> bool:
     Returns:
         True if password matches, False otherwise
     """
-    # Simple demo - in production use bcrypt
-    return password == hashed
+    salt_hex, sep, _ = hashed.partition("$")
+    if not sep:
+        return False
+    try:
+        salt = bytes.fromhex(salt_hex)
+    except ValueError:
+        return False
+    candidate = hash_password(password, salt)
+    # Constant-time comparison avoids leaking how many characters matched
+    return hmac.compare_digest(candidate.encode(), hashed.encode())
+
+
+# Demo user database, hashed once at import
+_USERS: Final[Mapping[str, str]] = MappingProxyType({
+    "admin": hash_password("admin123"),
+    "user": hash_password("password456")
+})
 
 
 def authenticate_user(username: str, password: str) -> dict:
@@ -35,16 +74,10 @@ def authenticate_user(username: str, password: str) -> dict:
     Raises:
         AuthenticationError: If authentication fails
     """
-    # Demo user database
-    users = {
-        "admin": "admin123",
-        "user": "password456"
-    }
-    
-    if username not in users:
+    if username not in _USERS:
         raise AuthenticationError(f"User {username} not found")
     
-    if not verify_password(password, users[username]):
+    if not verify_password(password, _USERS[username]):
         raise AuthenticationError("Invalid password")
     
     return {
@@ -59,20 +92,31 @@ class SessionManager:
     
     def __init__(self):
         """Initialize session manager."""
-        self.sessions = {}
+        self._active: set[bytes] = set()
+        self._usernames: dict[bytes, str] = {}
+    
+    @staticmethod
+    def _key(token: str) -> bytes:
+        """Hash a token to a fixed-size session key."""
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
     
     def create_session(self, username: str, token: str) -> None:
         """Create a new session."""
-        self.sessions[token] = {
-            "username": username,
-            "active": True
-        }
+        key = self._key(token)
+        self._active.add(key)
+        self._usernames[key] = username
     
     def validate_session(self, token: str) -> bool:
         """Validate a session token."""
-        return token in self.sessions and self.sessions[token]["active"]
+        return self._key(token) in self._active
+    
+    def get_username(self, token: str) -> Optional[str]:
+        """Get the username for an active session."""
+        key = self._key(token)
+        return self._usernames.get(key) if key in self._active else None
     
     def destroy_session(self, token: str) -> None:
         """Destroy a session."""
-        if token in self.sessions:
-            self.sessions[token]["active"] = False
+        key = self._key(token)
+        self._active.discard(key)
+        self._usernames.pop(key, None)
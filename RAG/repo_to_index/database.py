@@ -1,6 +1,7 @@
 """Database module for handling data persistence."""
 import json
-from typing import Any, Dict, List
+import queue
+from typing import Any, Dict, List, Optional
 
 
 class DatabaseError(Exception):
@@ -13,47 +14,46 @@ class SimpleDatabase:
     
     def __init__(self):
         """Initialize the database."""
-        self.data: Dict[str, List[Dict[str, Any]]] = {}
+        self.data: Dict[str, Dict[int, Dict[str, Any]]] = {}
+        self._next_id: Dict[str, int] = {}
     
     def create_table(self, table_name: str) -> None:
         """Create a new table."""
         if table_name in self.data:
             raise DatabaseError(f"Table {table_name} already exists")
-        self.data[table_name] = []
+        self.data[table_name] = {}
+        self._next_id[table_name] = 0
     
     def insert(self, table_name: str, record: Dict[str, Any]) -> None:
         """Insert a record into a table."""
         if table_name not in self.data:
             raise DatabaseError(f"Table {table_name} does not exist")
-        record["id"] = len(self.data[table_name])
-        self.data[table_name].append(record)
+        record["id"] = self._next_id[table_name]
+        self._next_id[table_name] += 1
+        self.data[table_name][record["id"]] = record
     
     def select(self, table_name: str) -> List[Dict[str, Any]]:
         """Select all records from a table."""
         if table_name not in self.data:
             raise DatabaseError(f"Table {table_name} does not exist")
-        return self.data[table_name]
+        return list(self.data[table_name].values())
     
     def update(self, table_name: str, record_id: int, updates: Dict[str, Any]) -> None:
         """Update a record."""
         if table_name not in self.data:
             raise DatabaseError(f"Table {table_name} does not exist")
         
-        for record in self.data[table_name]:
-            if record.get("id") == record_id:
-                record.update(updates)
-                return
-        
-        raise DatabaseError(f"Record {record_id} not found")
+        try:
+            self.data[table_name][record_id].update(updates)
+        except KeyError:
+            raise DatabaseError(f"Record {record_id} not found")
     
     def delete(self, table_name: str, record_id: int) -> None:
         """Delete a record."""
         if table_name not in self.data:
             raise DatabaseError(f"Table {table_name} does not exist")
         
-        self.data[table_name] = [
-            r for r in self.data[table_name] if r.get("id") != record_id
-        ]
+        self.data[table_name].pop(record_id, None)
 
 
 class ConnectionPool:
@@ -62,15 +62,24 @@ class ConnectionPool:
     def __init__(self, max_connections: int = 10):
         """Initialize connection pool."""
         self.max_connections = max_connections
-        self.available_connections = max_connections
+        self._pool: queue.SimpleQueue = queue.SimpleQueue()
+        for connection_id in range(max_connections):
+            self._pool.put({"connection_id": connection_id})
+    
+    @property
+    def available_connections(self) -> int:
+        """Number of connections currently available."""
+        return self._pool.qsize()
     
-    def acquire(self) -> Dict[str, Any]:
+    def acquire(self, timeout: Optional[float] = None) -> Dict[str, Any]:
         """Acquire a connection from the pool."""
-        if self.available_connections <= 0:
+        try:
+            if timeout is None:
+                return self._pool.get_nowait()
+            return self._pool.get(timeout=timeout)
+        except queue.Empty:
             raise DatabaseError("No available connections")
-        self.available_connections -= 1
-        return {"connection_id": id(self)}
     
     def release(self, connection: Dict[str, Any]) -> None:
         """Release a connection back to the pool."""
-        self.available_connections += 1
+        self._pool.put(connection)
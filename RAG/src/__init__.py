@@ -1,8 +1,8 @@
 """RAG system package initialization."""
 from src.rag_system import RAGSystem
-from src.config import settings
+from src.config import settings, get_settings
 
 __version__ = "0.1.0"
 __author__ = "RAG System Team"
 
-__all__ = ["RAGSystem", "settings"]
+__all__ = ["RAGSystem", "settings", "get_settings"]
@@ -0,0 +1,343 @@
+"""Semantic response cache for repeated or paraphrased search queries."""
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import pickle
+import threading
+import time
+import uuid
+import numpy as np
+
+import faiss
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+from src.utils.models import ContextualResult
+from src.utils.logger import logger
+
+
+class SemanticCache:
+    """Caches search results keyed by query embedding similarity."""
+
+    REDIS_PREFIX = "rag:semantic_cache"
+    # Recent query embeddings kept so a miss's put() doesn't re-embed
+    EMBEDDING_CACHE_SIZE = 64
+
+    def __init__(
+        self,
+        embedding_model,
+        threshold: float = 0.95,
+        ttl: int = 3600,
+        max_entries: int = 256,
+        redis_url: Optional[str] = None,
+        index_fingerprint: Optional[Callable[[], str]] = None,
+        encode_fn: Optional[Callable[[List[str]], np.ndarray]] = None
+    ):
+        """
+        Initialize semantic cache.
+
+        Args:
+            embedding_model: SentenceTransformer used to embed queries
+                (reuse the retriever's model to avoid loading a second one)
+            threshold: Minimum cosine similarity for a cache hit
+            ttl: Time-to-live of cached entries in seconds
+            max_entries: Maximum number of in-process entries (LRU eviction)
+            redis_url: Optional Redis URL for storing cached payloads
+            index_fingerprint: Returns an identifier of the searched index;
+                entries cached against a different index never match
+            encode_fn: Returns normalized embeddings for a list of texts, e.g.
+                ``SemanticRetriever.encode_batch``; defaults to calling
+                ``embedding_model.encode``
+        """
+        self.embedding_model = embedding_model
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.embedding_dim = embedding_model.get_sentence_embedding_dimension()
+        self.index_fingerprint = index_fingerprint
+        self.encode_fn = encode_fn
+        self._embeddings: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._embeddings_lock = threading.Lock()
+
+        # Inner product over normalized vectors == cosine similarity
+        self.index = faiss.IndexIDMap(faiss.IndexFlatIP(self.embedding_dim))
+        self.entries: "OrderedDict[int, Tuple[str, float]]" = OrderedDict()
+        self.payloads: Dict[int, bytes] = {}
+        # Guards the index and entries; queries are embedded outside it
+        self._lock = threading.RLock()
+
+        self.redis = None
+        if redis_url:
+            if not REDIS_AVAILABLE:
+                logger.warning("redis not available. Using in-process semantic cache.")
+            else:
+                try:
+                    self.redis = redis.Redis.from_url(redis_url)
+                    self.redis.ping()
+                    self._load_from_redis()
+                    logger.info(f"Semantic cache using Redis backend at {redis_url}")
+                except Exception as e:
+                    logger.warning(f"Could not connect to Redis, using in-process cache: {e}")
+                    self.redis = None
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, query: str, **search_kwargs: Any) -> Optional[List[ContextualResult]]:
+        """
+        Look up cached results for a query.
+
+        Args:
+            query: Search query
+            **search_kwargs: Search parameters the cached results must match
+
+        Returns:
+            Cached results on a hit, None otherwise
+        """
+        if not self.entries:
+            self.misses += 1
+            return None
+
+        embedding = self._embed(query)
+        params_key = self._params_key(search_kwargs)
+        now = time.time()
+
+        with self._lock:
+            k = min(len(self.entries), 8)
+            scores, ids = self.index.search(embedding, k)
+
+            for score, entry_id in zip(scores[0], ids[0]):
+                if entry_id < 0 or score < self.threshold:
+                    break
+
+                entry_id = int(entry_id)
+                if entry_id not in self.entries:
+                    continue  # Evicted since the search
+                entry_params, expires_at = self.entries[entry_id]
+                if expires_at < now:
+                    self._evict(entry_id)
+                    continue
+                if entry_params != params_key:
+                    continue
+
+                payload = self._load_payload(entry_id)
+                if payload is None:
+                    self._evict(entry_id)
+                    continue
+
+                self.entries.move_to_end(entry_id)
+                self.hits += 1
+                logger.info(f"Semantic cache hit (similarity: {score:.3f}) for: {query}")
+                return pickle.loads(payload)
+
+            self.misses += 1
+            return None
+
+    def put(
+        self,
+        query: str,
+        results: List[ContextualResult],
+        **search_kwargs: Any
+    ) -> None:
+        """
+        Store results for a query.
+
+        Args:
+            query: Search query
+            results: Results returned by the search pipeline
+            **search_kwargs: Search parameters used to produce the results
+        """
+        # Random 63-bit ids keep entries from separate processes apart in Redis
+        entry_id = uuid.uuid4().int & 0x7FFFFFFFFFFFFFFF
+        embedding = self._embed(query)
+        params_key = self._params_key(search_kwargs)
+        expires_at = time.time() + self.ttl
+
+        payload = pickle.dumps(results)
+
+        with self._lock:
+            self._add_entry(entry_id, embedding, params_key, expires_at)
+            self._store_payload(entry_id, embedding, params_key, expires_at, payload)
+
+            while len(self.entries) > self.max_entries:
+                self._evict(next(iter(self.entries)))
+
+    def search(self, rag, query: str, **search_kwargs: Any) -> List[ContextualResult]:
+        """
+        Run ``rag.search`` through the cache.
+
+        Args:
+            rag: RAGSystem instance
+            query: Search query
+            **search_kwargs: Keyword arguments forwarded to ``rag.search``
+
+        Returns:
+            Cached or freshly computed contextual results
+        """
+        results = self.get(query, **search_kwargs)
+        if results is not None:
+            return results
+
+        results = rag.search(query, **search_kwargs)
+        self.put(query, results, **search_kwargs)
+        return results
+
+    def search_batch(
+        self,
+        rag,
+        queries: List[str],
+        **search_kwargs: Any
+    ) -> List[List[ContextualResult]]:
+        """
+        Run ``rag.search_batch`` through the cache, searching only the misses.
+
+        Args:
+            rag: RAGSystem instance
+            queries: Search queries
+            **search_kwargs: Keyword arguments forwarded to ``rag.search_batch``
+
+        Returns:
+            Cached or freshly computed contextual results for each query
+        """
+        all_results = [self.get(query, **search_kwargs) for query in queries]
+        misses = [i for i, results in enumerate(all_results) if results is None]
+
+        if misses:
+            fresh = rag.search_batch([queries[i] for i in misses], **search_kwargs)
+            for i, results in zip(misses, fresh):
+                self.put(queries[i], results, **search_kwargs)
+                all_results[i] = results
+
+        return all_results
+
+    def clear(self) -> None:
+        """Remove all cached entries."""
+        with self._lock:
+            for entry_id in list(self.entries):
+                self._evict(entry_id)
+
+    def get_stats(self) -> dict:
+        """Get cache statistics."""
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "backend": "redis" if self.redis else "memory"
+        }
+
+    def _embed(self, query: str) -> np.ndarray:
+        """Embed and normalize a query for inner-product search."""
+        with self._embeddings_lock:
+            embedding = self._embeddings.get(query)
+            if embedding is not None:
+                self._embeddings.move_to_end(query)
+                return embedding
+
+        if self.encode_fn is not None:
+            embedding = self.encode_fn([query])
+        else:
+            embedding = self.embedding_model.encode(
+                [query],
+                convert_to_numpy=True,
+                normalize_embeddings=True
+            )
+        embedding = np.asarray(embedding, dtype=np.float32)
+
+        with self._embeddings_lock:
+            self._embeddings[query] = embedding
+            while len(self._embeddings) > self.EMBEDDING_CACHE_SIZE:
+                self._embeddings.popitem(last=False)
+        return embedding
+
+    def _add_entry(
+        self,
+        entry_id: int,
+        embedding: np.ndarray,
+        params_key: str,
+        expires_at: float
+    ) -> None:
+        """Register an entry in the similarity index."""
+        self.index.add_with_ids(embedding, np.array([entry_id], dtype=np.int64))
+        self.entries[entry_id] = (params_key, expires_at)
+
+    def _evict(self, entry_id: int) -> None:
+        """Remove an entry from the index and payload store."""
+        self.index.remove_ids(np.array([entry_id], dtype=np.int64))
+        self.entries.pop(entry_id, None)
+        self.payloads.pop(entry_id, None)
+        if self.redis:
+            try:
+                self.redis.delete(self._redis_key(entry_id))
+            except Exception as e:
+                logger.warning(f"Failed to delete cache entry from Redis: {e}")
+
+    def _store_payload(
+        self,
+        entry_id: int,
+        embedding: np.ndarray,
+        params_key: str,
+        expires_at: float,
+        payload: bytes
+    ) -> None:
+        """Store a pickled payload in the configured backend."""
+        if self.redis:
+            record = pickle.dumps({
+                "embedding": embedding,
+                "params_key": params_key,
+                "expires_at": expires_at,
+                "payload": payload
+            })
+            try:
+                self.redis.set(self._redis_key(entry_id), record, ex=self.ttl)
+                return
+            except Exception as e:
+                logger.warning(f"Failed to write cache entry to Redis: {e}")
+        self.payloads[entry_id] = payload
+
+    def _load_payload(self, entry_id: int) -> Optional[bytes]:
+        """Load a pickled payload from the configured backend."""
+        if entry_id in self.payloads:
+            return self.payloads[entry_id]
+        if self.redis:
+            try:
+                record = self.redis.get(self._redis_key(entry_id))
+                if record is not None:
+                    return pickle.loads(record)["payload"]
+            except Exception as e:
+                logger.warning(f"Failed to read cache entry from Redis: {e}")
+        return None
+
+    def _load_from_redis(self) -> None:
+        """Populate the similarity index from entries already in Redis."""
+        now = time.time()
+        for key in self.redis.scan_iter(match=f"{self.REDIS_PREFIX}:*"):
+            if len(self.entries) >= self.max_entries:
+                break
+            try:
+                record = pickle.loads(self.redis.get(key))
+                if record["expires_at"] < now:
+                    continue
+                entry_id = int(key.decode().rsplit(":", 1)[1])
+                self._add_entry(
+                    entry_id,
+                    record["embedding"],
+                    record["params_key"],
+                    record["expires_at"]
+                )
+            except Exception as e:
+                logger.warning(f"Skipping unreadable cache entry {key}: {e}")
+
+        logger.info(f"Loaded {len(self.entries)} semantic cache entries from Redis")
+
+    def _redis_key(self, entry_id: int) -> str:
+        """Build the Redis key for an entry."""
+        return f"{self.REDIS_PREFIX}:{entry_id}"
+
+    def _params_key(self, search_kwargs: Dict[str, Any]) -> str:
+        """Build a stable key from search parameters and the index identity."""
+        if self.index_fingerprint is not None:
+            search_kwargs = {**search_kwargs, "_index": self.index_fingerprint()}
+        return repr(sorted(search_kwargs.items()))
@@ -1,5 +1,6 @@
 """Configuration management for the RAG system."""
 import os
+from functools import cached_property, lru_cache
 from pathlib import Path
 from typing import Optional
 from pydantic import Field, ConfigDict
@@ -9,21 +10,33 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
 
-    model_config = ConfigDict(env_file=".env", case_sensitive=False)
+    model_config = ConfigDict(
+        env_file=".env",
+        case_sensitive=False,
+        frozen=True,
+        extra="ignore"
+    )
 
     # LLM Configuration
     openai_api_key: str = Field(default="", env="OPENAI_API_KEY")
     llm_model: str = Field(default="gpt-4", env="LLM_MODEL")
     embedding_model: str = Field(default="all-MiniLM-L6-v2", env="EMBEDDING_MODEL")
+    model_dtype: str = Field(default="bfloat16", env="MODEL_DTYPE")
 
     # System Configuration
     debug: bool = Field(default=False, env="DEBUG")
     log_level: str = Field(default="INFO", env="LOG_LEVEL")
     max_workers: int = Field(default=4, env="MAX_WORKERS")
-    batch_size: int = Field(default=32, env="BATCH_SIZE")
+    batch_size: int = Field(default=64, env="BATCH_SIZE")
 
     # Retrieval Configuration
     faiss_index_path: Path = Field(default=Path("./data/faiss_index"), env="FAISS_INDEX_PATH")
+    faiss_index_type: str = Field(default="auto", env="FAISS_INDEX_TYPE")
+    faiss_nprobe: int = Field(default=16, env="FAISS_NPROBE")
+    faiss_mmap: bool = Field(default=True, env="FAISS_MMAP")
+    faiss_use_gpu: bool = Field(default=True, env="FAISS_USE_GPU")
+    index_commit_batch_size: int = Field(default=256, env="INDEX_COMMIT_BATCH_SIZE")
+    index_commit_interval: float = Field(default=30.0, env="INDEX_COMMIT_INTERVAL")
     chunk_size: int = Field(default=512, env="CHUNK_SIZE")
     chunk_overlap: int = Field(default=50, env="CHUNK_OVERLAP")
     top_k_retrieval: int = Field(default=10, env="TOP_K_RETRIEVAL")
@@ -35,6 +48,9 @@ class Settings(BaseSettings):
         env="RERANKER_MODEL"
     )
     reranker_threshold: float = Field(default=0.5, env="RERANKER_THRESHOLD")
+    reranker_backend: str = Field(default="torch", env="RERANKER_BACKEND")  # torch, onnx, openvino
+    reranker_quantization: Optional[str] = Field(default="int8", env="RERANKER_QUANTIZATION")
+    reranker_onnx_path: Optional[Path] = Field(default=None, env="RERANKER_ONNX_PATH")
 
     # Repository Configuration
     repo_path: Path = Field(default=Path("./repo_to_index"), env="REPO_PATH")
@@ -46,25 +62,43 @@ class Settings(BaseSettings):
         default="__pycache__,node_modules,.git,.env",
         env="EXCLUDE_PATTERNS"
     )
+    max_file_bytes: int = Field(default=1_048_576, env="MAX_FILE_BYTES")
+    git_collect_stats: bool = Field(default=False, env="GIT_COLLECT_STATS")
 
     # Redis Configuration
     redis_url: Optional[str] = Field(default=None, env="REDIS_URL")
 
+    # Semantic Cache Configuration
+    semantic_cache_threshold: float = Field(default=0.95, env="SEMANTIC_CACHE_THRESHOLD")
+    semantic_cache_ttl: int = Field(default=3600, env="SEMANTIC_CACHE_TTL")
+    semantic_cache_max_entries: int = Field(default=256, env="SEMANTIC_CACHE_MAX_ENTRIES")
+
     # API Configuration
     api_host: str = Field(default="0.0.0.0", env="API_HOST")
     api_port: int = Field(default=8000, env="API_PORT")
     streamlit_port: int = Field(default=8501, env="STREAMLIT_PORT")
 
     @property
+    def reranker_onnx_dir(self) -> Path:
+        """Get directory for the exported ONNX reranker."""
+        return self.reranker_onnx_path or self.faiss_index_path.parent / "reranker_onnx"
+
+    @cached_property
     def included_extensions(self) -> list[str]:
         """Get list of included file extensions."""
         return [ext.strip() for ext in self.include_extensions.split(",")]
 
-    @property
+    @cached_property
     def excluded_patterns_list(self) -> list[str]:
         """Get list of excluded directory patterns."""
         return [pattern.strip() for pattern in self.exclude_patterns.split(",")]
 
 
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Get the process-wide settings instance, constructing it once."""
+    return Settings()
+
+
 # Global settings instance
-settings = Settings()
+settings = get_settings()
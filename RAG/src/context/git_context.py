@@ -1,7 +1,11 @@
 """Commit-aware context module for git-based code understanding."""
-from typing import List, Optional, Dict, Any
+from bisect import bisect_right
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict, Any, Tuple
 from pathlib import Path
 from datetime import datetime
+import threading
 
 try:
     import git
@@ -11,6 +15,12 @@ except ImportError:
     GIT_AVAILABLE = False
     GitCommit = None
 
+try:
+    import pygit2
+    PYGIT2_AVAILABLE = True
+except ImportError:
+    PYGIT2_AVAILABLE = False
+
 from src.utils.models import CodeChunk, CommitContext, ContextualResult, RankedResult
 from src.utils.logger import logger
 
@@ -18,15 +28,43 @@ from src.utils.logger import logger
 class GitContextManager:
     """Manages git repository context for code chunks."""
 
-    def __init__(self, repo_path: Path):
+    # Maximum number of files whose blame is kept in memory
+    BLAME_CACHE_SIZE = 128
+
+    # Record separator, then NUL-separated hash, author, timestamp and body;
+    # the --numstat lines follow the final NUL
+    _LOG_FORMAT = "%x1e%H%x00%an%x00%ct%x00%B%x00"
+
+    # Delimiter git prints for --format=%x00COMMIT%x00 before each commit's
+    # --name-only file list
+    _COMMIT_MARKER = "\x00COMMIT\x00"
+
+    # Most commits walked in-process by get_files_commits_batch before
+    # handing off to git log
+    MAX_WALK_COMMITS = 5000
+
+    def __init__(self, repo_path: Path, collect_stats: bool = False):
         """
         Initialize git context manager.
 
         Args:
             repo_path: Path to git repository
+            collect_stats: Compute changed files and line counts for commits.
+                This makes git diff every commit, so it is off by default and
+                commit contexts report no files and zero insertions/deletions.
         """
         self.repo_path = repo_path
+        self.collect_stats = collect_stats
         self.repo = None
+        self._blame_cache: "OrderedDict[Tuple[str, str], Tuple[List[int], List[Tuple[int, int, GitCommit]]]]" = OrderedDict()
+        self._blame_head: Optional[str] = None
+        self._blame_lock = threading.Lock()
+        # GitPython's persistent cat-file processes (object reads and ref
+        # resolution) are not thread-safe
+        self._cat_file_lock = threading.Lock()
+        # Optional libgit2 handle for in-process history walks
+        self._pygit2_repo = None
+        self._pygit2_lock = threading.Lock()
         
         if not GIT_AVAILABLE:
             logger.warning("GitPython not available. Git context features will be disabled.")
@@ -38,6 +76,13 @@ class GitContextManager:
         except Exception as e:
             logger.warning(f"Could not initialize git repository: {e}")
             self.repo = None
+            return
+
+        if PYGIT2_AVAILABLE:
+            try:
+                self._pygit2_repo = pygit2.Repository(str(repo_path))
+            except Exception as e:
+                logger.warning(f"Could not open repository with pygit2, using git log: {e}")
 
     def get_file_commits(
         self,
@@ -59,18 +104,160 @@ class GitContextManager:
 
         commits = []
         try:
-            # Get commits for this file
-            git_commits = list(self.repo.iter_commits(paths=file_path, max_count=limit))
-
-            for commit in git_commits:
-                context = self._extract_commit_context(commit, file_path)
-                commits.append(context)
+            # One git log call returns metadata and stats for every commit
+            for info in self._log_commit_info(f"--max-count={limit}", "--", file_path):
+                commits.append(self._extract_commit_context(info))
 
         except Exception as e:
             logger.warning(f"Failed to get commits for {file_path}: {e}")
 
         return commits
 
+    def get_files_commits_batch(
+        self,
+        file_paths: List[str],
+        limit: int = 10
+    ) -> Dict[str, List[CommitContext]]:
+        """
+        Get commits for several files with a single history walk.
+
+        The walk runs in-process through pygit2 when it is installed and
+        diff stats are not collected; otherwise a single git log call is used.
+
+        Args:
+            file_paths: Paths to files
+            limit: Maximum number of commits per file
+
+        Returns:
+            Mapping of each path to its commit contexts, newest first
+        """
+        commits: Dict[str, List[CommitContext]] = {file_path: [] for file_path in file_paths}
+        if not self.repo or not file_paths or limit <= 0:
+            return commits
+
+        try:
+            by_relative = {self._repo_relative(p): p for p in file_paths}
+
+            if self._pygit2_repo is not None and not self.collect_stats:
+                walked = self._walk_files_commits(by_relative, limit)
+                if walked is not None:
+                    return walked
+
+            max_count = limit * len(by_relative)
+
+            # Each commit lists which of the requested files it changed
+            diff_args = ("--numstat",) if self.collect_stats else ("--name-only",)
+            output = self.repo.git.log(
+                "--root",
+                "--no-renames",
+                *diff_args,
+                f"--max-count={max_count}",
+                f"--format={self._LOG_FORMAT}",
+                "--",
+                *by_relative
+            )
+
+            records = output.split("\x1e")[1:]
+            for record in records:
+                sha, author, timestamp, message, changes = record.split("\x00", 4)
+                for line in changes.strip().splitlines():
+                    if self.collect_stats:
+                        added, removed, path = line.split("\t", 2)
+                    else:
+                        # --name-only prints bare paths; there are no counts
+                        added = removed = ""
+                        path = line
+
+                    file_path = by_relative.get(path)
+                    if file_path is None or len(commits[file_path]) >= limit:
+                        continue
+
+                    commits[file_path].append(self._extract_commit_context({
+                        "hash": sha,
+                        "author": author,
+                        "date": datetime.fromtimestamp(int(timestamp)),
+                        "message": message.strip(),
+                        "changed_files": [path] if self.collect_stats else [],
+                        "insertions": int(added) if added.isdigit() else 0,
+                        "deletions": int(removed) if removed.isdigit() else 0
+                    }))
+
+            # Commits are shared across files, so a full window may have cut
+            # off older commits of rarely changed files; look those up alone
+            if len(records) >= max_count:
+                for file_path, file_commits in commits.items():
+                    if len(file_commits) < limit:
+                        commits[file_path] = self.get_file_commits(file_path, limit)
+
+        except Exception as e:
+            logger.warning(f"Failed to get commits for {len(file_paths)} files: {e}")
+
+        return commits
+
+    def _walk_files_commits(
+        self,
+        by_relative: Dict[str, str],
+        limit: int
+    ) -> Optional[Dict[str, List[CommitContext]]]:
+        """
+        Walk history from HEAD with pygit2, collecting commits that changed each file.
+
+        A commit changed a file when the file's blob differs from every
+        parent's (or the file exists in a root commit), so merges that took
+        one side's version unchanged are skipped, as git log does.
+
+        Args:
+            by_relative: Repository-relative paths mapped to the caller's paths
+            limit: Maximum number of commits per file
+
+        Returns:
+            Mapping of each caller path to its commit contexts, or None when
+            the walk stopped at MAX_WALK_COMMITS before every file was complete
+        """
+        def blob_id(tree, path):
+            try:
+                return tree[path].id
+            except KeyError:
+                return None
+
+        commits: Dict[str, List[CommitContext]] = {p: [] for p in by_relative.values()}
+        pending = set(by_relative)
+
+        with self._pygit2_lock:
+            if self._pygit2_repo.head_is_unborn:
+                return commits
+
+            walker = self._pygit2_repo.walk(self._pygit2_repo.head.target, pygit2.GIT_SORT_TIME)
+            for walked, commit in enumerate(walker):
+                if not pending:
+                    return commits
+                if walked >= self.MAX_WALK_COMMITS:
+                    return None
+
+                parent_trees = [parent.tree for parent in commit.parents]
+                for path in list(pending):
+                    entry_id = blob_id(commit.tree, path)
+                    if parent_trees:
+                        if any(blob_id(tree, path) == entry_id for tree in parent_trees):
+                            continue
+                    elif entry_id is None:
+                        continue
+
+                    file_commits = commits[by_relative[path]]
+                    file_commits.append(self._extract_commit_context({
+                        "hash": str(commit.id),
+                        "author": commit.author.name,
+                        "date": datetime.fromtimestamp(commit.commit_time),
+                        "message": commit.message.strip(),
+                        "changed_files": [],
+                        "insertions": 0,
+                        "deletions": 0
+                    }))
+                    if len(file_commits) >= limit:
+                        pending.discard(path)
+
+        return commits
+
     def get_chunk_commits(
         self,
         chunk: CodeChunk,
@@ -92,18 +279,18 @@ class GitContextManager:
         try:
             # Get blame information for the chunk
             file_path = Path(chunk.file_path).relative_to(self.repo_path)
-            commits = self.repo.blame("HEAD", str(file_path))
+            starts, blame_ranges = self._get_blame_ranges(str(file_path))
 
             chunk_commits = {}
-            for commit, lines in commits:
-                # Check if any blamed lines fall within chunk range
-                if self._overlaps_chunk(lines, chunk.start_line, chunk.end_line):
-                    chunk_commits[commit.hexsha] = commit
+            for _, _, commit in self._overlapping_ranges(
+                starts, blame_ranges, chunk.start_line, chunk.end_line
+            ):
+                chunk_commits[commit.hexsha] = commit
 
             # Convert to contexts and limit
+            commit_info = self._bulk_commit_info(list(chunk_commits)[:limit])
             contexts = [
-                self._extract_commit_context(commit, str(file_path))
-                for commit in list(chunk_commits.values())[:limit]
+                self._extract_commit_context(info) for info in commit_info.values()
             ]
 
             return contexts
@@ -132,13 +319,21 @@ class GitContextManager:
 
         try:
             file_path = Path(chunk.file_path).relative_to(self.repo_path)
-            git_commits = list(self.repo.iter_commits(paths=str(file_path), max_count=lookback_commits))
+
+            # One git process lists the files each commit changed; --full-diff
+            # keeps the pathspec from hiding the other files
+            output = self.repo.git.log(
+                f"--max-count={lookback_commits}",
+                "--name-only",
+                "--full-diff",
+                "--format=%x00COMMIT%x00",
+                "--",
+                str(file_path)
+            )
 
             related_files = set()
-            for commit in git_commits:
-                for item in commit.tree.traverse():
-                    if item.type == "blob":
-                        related_files.add(item.path)
+            for commit_files in output.split(self._COMMIT_MARKER):
+                related_files.update(filter(None, commit_files.splitlines()))
 
             # Remove the chunk's own file
             related_files.discard(str(file_path))
@@ -169,16 +364,14 @@ class GitContextManager:
 
         history = []
         try:
-            commits = list(self.repo.iter_commits(paths=file_path, max_count=limit))
-
-            for commit in commits:
+            for info in self._log_commit_info(f"--max-count={limit}", "--", file_path):
                 history.append({
-                    "hash": commit.hexsha[:7],
-                    "author": commit.author.name,
-                    "date": datetime.fromtimestamp(commit.committed_date),
-                    "message": commit.message.strip(),
-                    "insertions": 0,  # Would need to calculate from stats
-                    "deletions": 0
+                    "hash": info["hash"][:7],
+                    "author": info["author"],
+                    "date": info["date"],
+                    "message": info["message"],
+                    "insertions": info["insertions"],
+                    "deletions": info["deletions"]
                 })
 
         except Exception as e:
@@ -186,62 +379,191 @@ class GitContextManager:
 
         return history
 
-    def _extract_commit_context(
-        self,
-        commit: GitCommit,
-        file_path: str
-    ) -> CommitContext:
-        """Extract context information from a git commit."""
-        return CommitContext(
-            commit_hash=commit.hexsha[:7],
-            author=commit.author.name,
-            date=datetime.fromtimestamp(commit.committed_date),
-            message=commit.message.strip(),
-            changed_files=self._get_changed_files(commit),
-            insertions=self._get_insertions(commit),
-            deletions=self._get_deletions(commit)
+    def _bulk_commit_info(self, shas: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch metadata (and diff stats, if enabled) for several commits.
+
+        Without stats, commit objects are read through GitPython's
+        long-running ``git cat-file --batch`` process, so no new git process
+        is started. Stats need a diff and go through one ``git log`` call.
+
+        Args:
+            shas: Commit hashes
+
+        Returns:
+            Commit information keyed by full hash, in input order
+        """
+        if not shas:
+            return {}
+        if not self.collect_stats:
+            return {sha: self._read_commit(sha) for sha in shas}
+        return {
+            info["hash"]: info
+            for info in self._log_commit_info("--no-walk=unsorted", *shas)
+        }
+
+    def _read_commit(self, sha: str) -> Dict[str, Any]:
+        """
+        Read a commit object through the persistent cat-file process.
+
+        Args:
+            sha: Full commit hash
+
+        Returns:
+            Commit information dictionary without diff stats
+        """
+        with self._cat_file_lock:
+            data = self.repo.git.get_object_data(sha)[3]
+
+        header, _, message = data.partition(b"\n\n")
+        author = ""
+        timestamp = 0
+        for line in header.split(b"\n"):
+            if line.startswith(b"author "):
+                # "author Name <email> <timestamp> <tz>"
+                author = line[7:].rsplit(b" <", 1)[0].decode("utf-8", errors="replace")
+            elif line.startswith(b"committer "):
+                timestamp = int(line.rsplit(b" ", 2)[1])
+
+        return {
+            "hash": sha,
+            "author": author,
+            "date": datetime.fromtimestamp(timestamp),
+            "message": message.decode("utf-8", errors="replace").strip(),
+            "changed_files": [],
+            "insertions": 0,
+            "deletions": 0
+        }
+
+    def _log_commit_info(self, *log_args: str) -> List[Dict[str, Any]]:
+        """
+        Run ``git log`` and parse every commit it reports.
+
+        Diff stats (``--numstat``) are only requested when ``collect_stats``
+        is enabled.
+
+        Args:
+            *log_args: Revision and path arguments for git log
+
+        Returns:
+            List of commit information dictionaries
+        """
+        stats_args = ("--root", "--numstat") if self.collect_stats else ()
+        output = self.repo.git.log(
+            *stats_args,
+            f"--format={self._LOG_FORMAT}",
+            *log_args
         )
 
-    def _overlaps_chunk(self, lines: List, start: int, end: int) -> bool:
-        """Check if blamed lines overlap with chunk range."""
-        for line in lines:
-            if start <= line <= end:
-                return True
-        return False
+        commits = []
+        for record in output.split("\x1e")[1:]:
+            sha, author, timestamp, message, numstat = record.split("\x00", 4)
+
+            changed_files = []
+            insertions = deletions = 0
+            for line in numstat.strip().splitlines():
+                added, removed, path = line.split("\t", 2)
+                changed_files.append(path)
+                # Binary files report "-" instead of line counts
+                insertions += int(added) if added.isdigit() else 0
+                deletions += int(removed) if removed.isdigit() else 0
+
+            commits.append({
+                "hash": sha,
+                "author": author,
+                "date": datetime.fromtimestamp(int(timestamp)),
+                "message": message.strip(),
+                "changed_files": changed_files,
+                "insertions": insertions,
+                "deletions": deletions
+            })
 
-    @staticmethod
-    def _get_changed_files(commit: GitCommit) -> List[str]:
-        """Get list of files changed in commit."""
+        return commits
+
+    def _repo_relative(self, file_path: str) -> str:
+        """Convert a path to the repository-relative form git log prints."""
         try:
-            if commit.parents:
-                changed = commit.parents[0].tree.diff_to_tree(commit.tree)
-                return [item.path for item in changed]
-        except Exception:
-            pass
-        return []
+            return Path(file_path).relative_to(self.repo_path).as_posix()
+        except ValueError:
+            return Path(file_path).as_posix()
 
     @staticmethod
-    def _get_insertions(commit: GitCommit) -> int:
-        """Get number of insertions in commit."""
-        try:
-            stats = commit.stats.total
-            return stats.get("insertions", 0)
-        except Exception:
-            return 0
+    def _extract_commit_context(info: Dict[str, Any]) -> CommitContext:
+        """Build a commit context from parsed git log information."""
+        return CommitContext(
+            commit_hash=info["hash"][:7],
+            author=info["author"],
+            date=info["date"],
+            message=info["message"],
+            changed_files=info["changed_files"],
+            insertions=info["insertions"],
+            deletions=info["deletions"]
+        )
+
+    def _get_blame_ranges(
+        self,
+        file_path: str
+    ) -> Tuple[List[int], List[Tuple[int, int, GitCommit]]]:
+        """
+        Get blame for a file as sorted (start_line, end_line, commit) ranges.
+
+        Results are cached per (HEAD sha, file) so chunks from the same file
+        share one blame run; the cache is cleared when HEAD moves.
+
+        Args:
+            file_path: Path relative to the repository root
+
+        Returns:
+            Range start lines (for bisection) and the ranges in file order
+        """
+        with self._cat_file_lock:
+            head_sha = self.repo.head.commit.hexsha
+        key = (head_sha, file_path)
+        with self._blame_lock:
+            if head_sha != self._blame_head:
+                self._blame_cache.clear()
+                self._blame_head = head_sha
+
+            if key in self._blame_cache:
+                self._blame_cache.move_to_end(key)
+                return self._blame_cache[key]
+
+        # Blame entries are consecutive hunks in file order
+        ranges = []
+        line_number = 1
+        for commit, lines in self.repo.blame(head_sha, file_path):
+            ranges.append((line_number, line_number + len(lines) - 1, commit))
+            line_number += len(lines)
+
+        entry = ([start for start, _, _ in ranges], ranges)
+        with self._blame_lock:
+            self._blame_cache[key] = entry
+            if len(self._blame_cache) > self.BLAME_CACHE_SIZE:
+                self._blame_cache.popitem(last=False)
+
+        return entry
 
     @staticmethod
-    def _get_deletions(commit: GitCommit) -> int:
-        """Get number of deletions in commit."""
-        try:
-            stats = commit.stats.total
-            return stats.get("deletions", 0)
-        except Exception:
-            return 0
+    def _overlapping_ranges(
+        starts: List[int],
+        ranges: List[Tuple[int, int, GitCommit]],
+        start: int,
+        end: int
+    ) -> List[Tuple[int, int, GitCommit]]:
+        """Get the blamed line ranges that overlap with a chunk range."""
+        # Ranges are sorted and contiguous: find the last range starting at
+        # or before the chunk start, and stop before the first starting after its end
+        first = max(bisect_right(starts, start) - 1, 0)
+        last = bisect_right(starts, end)
+        return [r for r in ranges[first:last] if r[1] >= start]
 
 
 class ContextualRetriever:
     """Adds contextual information to retrieved results."""
 
+    # Number of concurrent git lookups when enriching results
+    MAX_WORKERS = 8
+
     def __init__(self, git_context: GitContextManager):
         """
         Initialize contextual retriever.
@@ -269,22 +591,27 @@ class ContextualRetriever:
             Contextual results with additional metadata
         """
         contextual_results = []
+        chunks = [ranked_result.result.chunk for ranked_result in ranked_results]
+        if not chunks:
+            return contextual_results
+
+        # Git lookups are subprocess-bound, so run them concurrently
+        with ThreadPoolExecutor(max_workers=min(self.MAX_WORKERS, len(chunks))) as executor:
+            chunk_commits = list(executor.map(
+                lambda chunk: self.git_context.get_chunk_commits(chunk, limit=1),
+                chunks
+            ))
+            if include_related:
+                all_related_files = list(executor.map(self.git_context.get_related_changes, chunks))
 
-        for ranked_result in ranked_results:
-            chunk = ranked_result.result.chunk
-
+        for ranked_result, commits in zip(ranked_results, chunk_commits):
             # Get commit context
-            commit_context = None
-            commits = self.git_context.get_chunk_commits(chunk, limit=1)
-            if commits:
-                commit_context = commits[0]
+            commit_context = commits[0] if commits else None
 
             # Get related chunks
             related_chunks = []
-            if include_related:
-                related_files = self.git_context.get_related_changes(chunk)
-                # In a full implementation, would retrieve chunks from these files
-                # For now, just store the file paths
+            # In a full implementation, would retrieve chunks from the files in
+            # all_related_files; for now they are only looked up
 
             contextual_result = ContextualResult(
                 ranked_result=ranked_result,
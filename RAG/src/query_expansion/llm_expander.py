@@ -1,20 +1,56 @@
 """LLM-driven query expansion module for improved retrieval."""
-from typing import List
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional, Tuple
+import re
+import threading
 from src.utils.models import QueryExpansionResult
 from src.utils.logger import logger
 
+# Static instructions sent first on every call so provider-side prompt
+# caching can reuse the prefix; per-call content goes in the user message.
+_SYSTEM_PREFIX = """You are an expert at understanding code search queries.
+Your task is to expand a user's search query into multiple alternative queries that would
+help find relevant code. Generate queries that explore different aspects and phrasings.
+
+Rules:
+- Each query should explore different aspects, use different terminology, or approach the search from a different angle.
+- Focus on queries that would be useful for code search and retrieval.
+- Output exactly the requested number of queries, one per line, without numbering or prefixes."""
+
+# Bullet markers ("- ", "* ", "• ", ") ", "] ", "]: ") followed by optional
+# numbering ("1.", "1)") at the start of a response line
+_LIST_MARKER_RE = re.compile(r"^(?:(?:[-*•)]|\]:?) \s*)*(?:\d+[.)]\s*)?")
+
 
 class QueryExpander:
     """Expands queries using LLM for improved retrieval coverage."""
 
-    def __init__(self, llm_client):
+    # Maximum number of expansions kept in memory
+    CACHE_SIZE = 256
+
+    def __init__(
+        self,
+        llm_client,
+        repo_context: str = "",
+        prompt_cache_key: Optional[str] = None
+    ):
         """
         Initialize query expander with LLM client.
 
         Args:
             llm_client: OpenAI or compatible LLM client
+            repo_context: Static description of the indexed repository
+            prompt_cache_key: Optional key routing requests to the same prompt cache
         """
         self.llm_client = llm_client
+        self.prompt_cache_key = prompt_cache_key
+        self.system_prompt = _SYSTEM_PREFIX
+        if repo_context:
+            self.system_prompt += f"\n\nRepository context:\n{repo_context}"
+
+        self._cache: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._cache_lock = threading.Lock()
 
     def expand_query(
         self,
@@ -33,33 +69,28 @@ class QueryExpander:
         Returns:
             QueryExpansionResult with expanded queries and rationale
         """
+        cache_key = ("expand", self._normalize(query), expansion_count, context)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            expanded_queries, content = cached
+            return QueryExpansionResult(
+                original_query=query,
+                expanded_queries=list(expanded_queries),
+                expansion_rationale=content
+            )
+
         prompt = self._build_expansion_prompt(query, expansion_count, context)
 
         try:
-            response = self.llm_client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are an expert at understanding code search queries.
-Your task is to expand a user's search query into multiple alternative queries that would
-help find relevant code. Generate queries that explore different aspects and phrasings."""
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.7,
-                max_tokens=500
-            )
+            response = self._complete(prompt, max_tokens=500)
 
             content = response.choices[0].message.content
-            expanded_queries = self._parse_expanded_queries(content)
+            expanded_queries = self._parse_expanded_queries(content)[:expansion_count]
+            self._cache_put(cache_key, (expanded_queries, content))
 
             return QueryExpansionResult(
                 original_query=query,
-                expanded_queries=expanded_queries[:expansion_count],
+                expanded_queries=list(expanded_queries),
                 expansion_rationale=content
             )
 
@@ -78,16 +109,49 @@ help find relevant code. Generate queries that explore different aspects and phr
         expansion_count: int,
         context: str
     ) -> str:
-        """Build prompt for query expansion."""
-        context_str = f"\nContext: {context}" if context else ""
+        """Build prompt for query expansion (variable content only, query last)."""
+        context_str = f"Context: {context}\n" if context else ""
 
-        return f"""Given the following code search query, generate {expansion_count} alternative queries that would help find related code.
-Each query should explore different aspects, use different terminology, or approach the search from a different angle.
+        return f"""Number of alternative queries: {expansion_count}
+{context_str}Original Query: {query}"""
 
-Original Query: {query}{context_str}
-
-Please provide exactly {expansion_count} alternative queries, one per line, without numbering or prefixes.
-Focus on queries that would be useful for code search and retrieval."""
+    @staticmethod
+    def _normalize(query: str) -> str:
+        """Normalize a query for use in cache keys."""
+        return query.lower().strip()
+
+    def _cache_get(self, key: Tuple) -> Optional[Any]:
+        """Look up a cached expansion, marking it most recently used."""
+        with self._cache_lock:
+            if key not in self._cache:
+                return None
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+    def _cache_put(self, key: Tuple, value: Any) -> None:
+        """Store an expansion, evicting the least recently used entry."""
+        with self._cache_lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            if len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+    def _complete(self, prompt: str, max_tokens: int) -> object:
+        """Send the cached system prefix followed by the per-call prompt."""
+        kwargs = {}
+        if self.prompt_cache_key:
+            kwargs["extra_body"] = {"prompt_cache_key": self.prompt_cache_key}
+
+        return self.llm_client.chat.completions.create(
+            model="gpt-4",
+            messages=[
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.7,
+            max_tokens=max_tokens,
+            **kwargs
+        )
 
     @staticmethod
     def _parse_expanded_queries(response: str) -> List[str]:
@@ -97,14 +161,7 @@ Focus on queries that would be useful for code search and retrieval."""
 
         for line in lines:
             # Remove common prefixes and numbering
-            cleaned = line.strip()
-            for prefix in ["- ", "* ", "• ", ") ", "] ", "]: "]:
-                if cleaned.startswith(prefix):
-                    cleaned = cleaned[len(prefix):].strip()
-
-            # Remove numbering like "1.", "1)"
-            import re
-            cleaned = re.sub(r"^\d+[.)]\s*", "", cleaned)
+            cleaned = _LIST_MARKER_RE.sub("", line.strip(), count=1)
 
             if cleaned and len(cleaned) > 3:
                 queries.append(cleaned)
@@ -144,26 +201,24 @@ Focus on queries that would be useful for code search and retrieval."""
             "performance_optimization": "Generate queries for performance and optimization aspects."
         }
 
-        strategy_prompt = strategy_prompts.get(strategy, strategy_prompts["related_concepts"])
-
-        prompt = f"""Query: {query}
+        cache_key = ("strategy", self._normalize(query), strategy)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return list(cached)
 
-{strategy_prompt}
+        strategy_prompt = strategy_prompts.get(strategy, strategy_prompts["related_concepts"])
 
-Generate 3 alternative queries based on this strategy."""
+        prompt = f"""Strategy: {strategy_prompt}
+Number of alternative queries: 3
+Original Query: {query}"""
 
         try:
-            response = self.llm_client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=300
-            )
+            response = self._complete(prompt, max_tokens=300)
 
             content = response.choices[0].message.content
-            return self._parse_expanded_queries(content)
+            expanded_queries = self._parse_expanded_queries(content)
+            self._cache_put(cache_key, expanded_queries)
+            return list(expanded_queries)
 
         except Exception as e:
             logger.error(f"Strategy-based expansion failed: {e}")
@@ -173,9 +228,9 @@ Generate 3 alternative queries based on this strategy."""
 class HybridQueryExpander:
     """Combines multiple expansion strategies for comprehensive coverage."""
 
-    def __init__(self, llm_client):
+    def __init__(self, llm_client, repo_context: str = ""):
         """Initialize hybrid expander."""
-        self.expander = QueryExpander(llm_client)
+        self.expander = QueryExpander(llm_client, repo_context=repo_context)
 
     def expand_comprehensively(
         self,
@@ -200,11 +255,19 @@ class HybridQueryExpander:
             ]
 
         all_queries = {query}  # Use set to avoid duplicates
+        if not strategies:
+            return list(all_queries)
+
+        # Each strategy is a network round-trip, so issue them concurrently
+        with ThreadPoolExecutor(max_workers=len(strategies)) as executor:
+            futures = {
+                strategy: executor.submit(self.expander.expand_with_strategy, query, strategy)
+                for strategy in strategies
+            }
 
-        for strategy in strategies:
+        for strategy, future in futures.items():
             try:
-                expanded = self.expander.expand_with_strategy(query, strategy)
-                all_queries.update(expanded)
+                all_queries.update(future.result())
             except Exception as e:
                 logger.warning(f"Strategy {strategy} failed: {e}")
 
@@ -1,6 +1,7 @@
 """Main RAG coordinator class."""
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from src.ingestion.code_ingestion import RepositoryIngester
 from src.retrieval.semantic_retriever import SemanticRetriever
@@ -8,13 +9,16 @@ from src.ranking.cross_encoder import CrossEncoderReranker
 from src.context.git_context import GitContextManager, ContextualRetriever
 from src.query_expansion.llm_expander import QueryExpander
 from src.config import settings
-from src.utils.models import CodeChunk, ContextualResult
+from src.utils.models import CodeChunk, ContextualResult, RetrievalResult
 from src.utils.logger import logger
 
 
 class RAGSystem:
     """Main RAG system coordinator."""
 
+    # Concurrent LLM calls when expanding a batch of queries
+    MAX_EXPANSION_WORKERS = 8
+
     def __init__(self, llm_client=None):
         """
         Initialize RAG system.
@@ -25,24 +29,47 @@ class RAGSystem:
         self.ingester = RepositoryIngester(
             settings.repo_path,
             chunk_size=settings.chunk_size,
-            overlap=settings.chunk_overlap
+            overlap=settings.chunk_overlap,
+            max_workers=settings.max_workers,
+            max_file_bytes=settings.max_file_bytes
         )
 
         self.retriever = SemanticRetriever(
             model_name=settings.embedding_model,
-            index_path=settings.faiss_index_path
+            index_path=settings.faiss_index_path,
+            model_dtype=settings.model_dtype,
+            index_type=settings.faiss_index_type,
+            nprobe=settings.faiss_nprobe,
+            commit_batch_size=settings.index_commit_batch_size,
+            commit_interval=settings.index_commit_interval,
+            use_gpu=settings.faiss_use_gpu
         )
 
         self.reranker = CrossEncoderReranker(
-            model_name=settings.reranker_model
+            model_name=settings.reranker_model,
+            batch_size=settings.batch_size,
+            backend=settings.reranker_backend,
+            quantization=settings.reranker_quantization,
+            onnx_path=settings.reranker_onnx_dir,
+            model_dtype=settings.model_dtype
         )
 
-        self.git_context = GitContextManager(settings.repo_path)
+        self.git_context = GitContextManager(
+            settings.repo_path,
+            collect_stats=settings.git_collect_stats
+        )
         self.contextual_retriever = ContextualRetriever(self.git_context)
 
         self.query_expander = None
         if llm_client:
-            self.query_expander = QueryExpander(llm_client)
+            self.query_expander = QueryExpander(
+                llm_client,
+                repo_context=(
+                    f"Repository: {settings.repo_path}\n"
+                    f"Languages: {', '.join(settings.included_extensions)}"
+                ),
+                prompt_cache_key=str(settings.repo_path)
+            )
 
     def ingest_repository(self) -> List[CodeChunk]:
         """
@@ -87,96 +114,163 @@ class RAGSystem:
         Returns:
             List of contextual results
         """
+        return self.search_batch(
+            [query],
+            expand_query=expand_query,
+            include_context=include_context,
+            top_k=top_k
+        )[0]
+
+    def search_batch(
+        self,
+        queries: List[str],
+        expand_query: bool = True,
+        include_context: bool = True,
+        top_k: Optional[int] = None
+    ) -> List[List[ContextualResult]]:
+        """
+        Search the codebase for several queries at once.
+
+        Query expansion runs in background threads while the original
+        queries are retrieved; the expanded queries are then searched in one
+        more batch. All candidates are re-ranked in one scoring pass.
+
+        Args:
+            queries: Search queries
+            expand_query: Whether to use query expansion
+            include_context: Whether to include git context
+            top_k: Number of results per query (uses settings.top_k_ranking if None)
+
+        Returns:
+            List of contextual results for each query, in input order
+        """
         top_k = top_k or settings.top_k_ranking
 
-        # Step 1: Query expansion (optional)
-        queries = [query]
-        if expand_query and self.query_expander:
-            try:
-                expansion_result = self.query_expander.expand_query(query)
-                queries.extend(expansion_result.expanded_queries)
-                logger.info(f"Expanded query to {len(queries)} total queries")
-            except Exception as e:
-                logger.warning(f"Query expansion failed: {e}")
-
-        # Step 2: Semantic retrieval
-        all_results = []
-        for q in queries:
-            results = self.retriever.search(q, k=settings.top_k_retrieval)
-            all_results.extend(results)
-            logger.info(f"Retrieved {len(results)} results for: {q}")
-
-        # Deduplicate by chunk ID
-        seen = set()
-        unique_results = []
-        for result in all_results:
-            if result.chunk.chunk_id not in seen:
-                seen.add(result.chunk.chunk_id)
-                unique_results.append(result)
-
-        logger.info(f"After deduplication: {len(unique_results)} results")
-
-        # Step 3: Cross-encoder re-ranking
-        ranked_results = self.reranker.rerank(
-            query,
-            unique_results,
-            top_k=settings.top_k_ranking,
-            threshold=settings.reranker_threshold
+        # Step 1: Query expansion (optional) in background threads, overlapped
+        # with retrieval of the original queries
+        expansions: List[List[str]] = [[] for _ in queries]
+        workers = max(1, min(len(queries), self.MAX_EXPANSION_WORKERS))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = []
+            if expand_query and self.query_expander:
+                futures = [
+                    executor.submit(self.query_expander.expand_query, query)
+                    for query in queries
+                ]
+
+            # Step 2: Semantic retrieval, one batch for the original queries
+            # and one for all expanded queries
+            original_results = self.retriever.search_batch(
+                queries,
+                k=settings.top_k_retrieval,
+                batch_size=settings.batch_size
+            )
+
+            for i, future in enumerate(futures):
+                try:
+                    # Drop repeats and echoes of the original query
+                    expansions[i] = [
+                        q for q in dict.fromkeys(future.result().expanded_queries)
+                        if q != queries[i]
+                    ]
+                    logger.info(f"Expanded query to {len(expansions[i]) + 1} total queries")
+                except Exception as e:
+                    logger.warning(f"Query expansion failed: {e}")
+
+        expanded_results = self.retriever.search_batch(
+            [q for expanded in expansions for q in expanded],
+            k=settings.top_k_retrieval,
+            batch_size=settings.batch_size
         )
 
-        logger.info(f"After re-ranking: {len(ranked_results)} results")
+        grouped_results = []
+        offset = 0
+        for query, expanded, results in zip(queries, expansions, original_results):
+            group_results = [results, *expanded_results[offset:offset + len(expanded)]]
+            offset += len(expanded)
+            for q, q_results in zip([query, *expanded], group_results):
+                logger.info(f"Retrieved {len(q_results)} results for: {q}")
+            grouped_results.append(group_results)
+
+        candidates = []
+        for group_results in grouped_results:
+            # Deduplicate by chunk ID, keeping the best-scoring duplicate at
+            # the position where the chunk was first retrieved
+            unique_map: Dict[str, RetrievalResult] = {}
+            for results in group_results:
+                for result in results:
+                    current = unique_map.get(result.chunk.chunk_id)
+                    if current is None or result.relevance_score > current.relevance_score:
+                        unique_map[result.chunk.chunk_id] = result
+            unique_results = list(unique_map.values())
+
+            logger.info(f"After deduplication: {len(unique_results)} results")
+            candidates.append(unique_results)
+
+        # Step 3: Cross-encoder re-ranking across all queries
+        ranked_per_query = self.reranker.rerank_batch(
+            queries,
+            candidates,
+            top_k=top_k,
+            threshold=settings.reranker_threshold
+        )
 
         # Step 4: Add contextual information
-        if include_context:
-            contextual_results = self.contextual_retriever.enrich_results(
-                ranked_results,
-                include_history=True,
-                include_related=True
-            )
-        else:
-            contextual_results = [
-                ContextualResult(ranked_result=r) for r in ranked_results
-            ]
+        all_contextual_results = []
+        for ranked_results in ranked_per_query:
+            logger.info(f"After re-ranking: {len(ranked_results)} results")
+
+            if include_context:
+                contextual_results = self.contextual_retriever.enrich_results(
+                    ranked_results,
+                    include_history=True,
+                    include_related=True
+                )
+            else:
+                contextual_results = [
+                    ContextualResult(ranked_result=r) for r in ranked_results
+                ]
+            all_contextual_results.append(contextual_results)
 
-        return contextual_results
+        return all_contextual_results
 
-    def load_existing_index(self) -> None:
-        """Load existing FAISS index."""
+    def load_existing_index(self, mmap: Optional[bool] = None) -> None:
+        """
+        Load existing FAISS index.
+
+        Args:
+            mmap: Memory-map the index (uses settings.faiss_mmap if None)
+        """
+        mmap = settings.faiss_mmap if mmap is None else mmap
         logger.info(f"Loading index from {settings.faiss_index_path}")
-        self.retriever.load_index(settings.faiss_index_path)
+        self.retriever.load_index(settings.faiss_index_path, mmap=mmap)
         logger.info("Index loaded successfully")
 
-    def update_index(self, new_files: List[Path]) -> None:
+    def update_index(self, new_files: List[Path], commit: bool = True) -> None:
         """
         Update index with new files.
 
         Args:
             new_files: List of new file paths to index
+            commit: Commit and save the new chunks before returning. Pass
+                False in long-running processes to let the retriever batch
+                frequent small updates; staged chunks are then searchable
+                after its next commit.
         """
-        new_chunks = []
-        for file_path in new_files:
-            try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    content = f.read()
-                    chunks = self.ingester.chunker.chunk_file(
-                        file_path,
-                        content,
-                        file_path.suffix[1:]
-                    )
-                    new_chunks.extend(chunks)
-            except Exception as e:
-                logger.warning(f"Failed to process {file_path}: {e}")
+        # Files are chunked in parallel; the retriever encodes all of their
+        # chunks together at commit
+        new_chunks = self.ingester.chunk_files([Path(f) for f in new_files])
 
         if new_chunks:
-            self.retriever.update_index(new_chunks)
-            self.retriever.save_index()
-            logger.info(f"Updated index with {len(new_chunks)} new chunks")
+            self.retriever.update_index(new_chunks, commit=commit)
+            logger.info(f"Added {len(new_chunks)} new chunks to the index")
 
     def get_system_info(self) -> dict:
         """Get current system information."""
         return {
             "index_loaded": self.retriever.is_built,
             "index_size": len(self.retriever.chunk_map),
+            "indexed_files": len(self.retriever.indexed_files()),
             "repo_path": str(settings.repo_path),
             "embedding_model": settings.embedding_model,
             "reranker_model": settings.reranker_model,
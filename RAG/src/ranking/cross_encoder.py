@@ -1,19 +1,97 @@
 """Cross-encoder based re-ranking module for improved result quality."""
-from typing import List, Tuple
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+import re
+import threading
+import time
 import numpy as np
+import torch
 from sentence_transformers import CrossEncoder
 
+try:
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+    OPTIMUM_AVAILABLE = True
+except ImportError:
+    OPTIMUM_AVAILABLE = False
+
+from src.ingestion.code_ingestion import SOURCE_EXTENSIONS
 from src.utils.models import RetrievalResult, RankedResult
 from src.utils.logger import logger
+from src.utils.precision import resolve_model_dtype, upcast_logits
+
+QUANTIZED_ONNX_FILE = "model_quantized.onnx"
+
+# Queries that look up a literal: a quoted string or a bare source file
+# name. Other dotted names (settings.batch_size, os.path.join) are code
+# queries and still get scored.
+_LITERAL_QUERY_RE = re.compile(
+    r"""^(?:"[^"]+"|'[^']+'|[\w./-]+(?:%s))$"""
+    % "|".join(re.escape(ext) for ext in SOURCE_EXTENSIONS)
+)
+
+
+def export_onnx_reranker(
+    model_name: str,
+    output_dir: Path,
+    quantization: Optional[str] = "int8"
+) -> Path:
+    """
+    Export a cross-encoder to ONNX, optionally with int8 dynamic quantization.
+
+    Args:
+        model_name: HuggingFace cross-encoder model name
+        output_dir: Directory to write the exported model to
+        quantization: "int8" for AVX-512 VNNI dynamic quantization, None to skip
+
+    Returns:
+        Path to the exported model directory
+    """
+    if not OPTIMUM_AVAILABLE:
+        raise ImportError("optimum[onnxruntime] is required to export the reranker")
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    logger.info(f"Exporting {model_name} to ONNX at {output_dir}...")
+    model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+    model.save_pretrained(output_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(output_dir)
+
+    if quantization == "int8":
+        quantizer = ORTQuantizer.from_pretrained(model)
+        quantization_config = AutoQuantizationConfig.avx512_vnni(
+            is_static=False,
+            per_channel=False
+        )
+        quantizer.quantize(save_dir=output_dir, quantization_config=quantization_config)
+        logger.info(f"Quantized reranker saved to {output_dir / QUANTIZED_ONNX_FILE}")
+
+    return output_dir
 
 
 class CrossEncoderReranker:
     """Re-ranks retrieval results using cross-encoder models."""
 
+    # Cached (query, passage) scores: maximum entries and lifetime in seconds
+    SCORE_CACHE_SIZE = 4096
+    SCORE_CACHE_TTL = 900
+    # Passages are truncated by the tokenizer to the model's max_length in
+    # tokens; this character cap only bounds tokenization work on huge chunks
+    MAX_PASSAGE_CHARS = 8192
+    # Pairs scored between partial rankings in rerank_stream
+    STREAM_BATCH_SIZE = 8
+
     def __init__(
         self,
         model_name: str = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1",
-        batch_size: int = 32
+        batch_size: int = 32,
+        backend: str = "torch",
+        quantization: Optional[str] = None,
+        onnx_path: Optional[Path] = None,
+        model_dtype: str = "float32"
     ):
         """
         Initialize cross-encoder reranker.
@@ -21,18 +99,71 @@ class CrossEncoderReranker:
         Args:
             model_name: HuggingFace cross-encoder model name
             batch_size: Batch size for scoring
+            backend: Inference backend ("torch", "onnx" or "openvino")
+            quantization: "int8" to use a quantized ONNX export
+            onnx_path: Directory holding (or receiving) the ONNX export
+            model_dtype: Weight dtype for the torch backend
         """
         self.model_name = model_name
         self.batch_size = batch_size
-        self.model = CrossEncoder(model_name)
-        logger.info(f"Loaded cross-encoder model: {model_name}")
+        self.backend = backend
+        self.quantization = quantization
+        self.onnx_path = onnx_path
+        self.model_dtype = model_dtype
+        self._score_cache: "OrderedDict[Tuple[str, str], Tuple[float, float]]" = OrderedDict()
+        self._score_cache_lock = threading.Lock()
+        self.model = self._load_model()
+        logger.info(f"Loaded cross-encoder model: {model_name} ({self.backend})")
+
+    def _load_model(self) -> CrossEncoder:
+        """Load the cross-encoder on the configured backend, falling back to torch."""
+        if self.backend != "torch" and torch.cuda.is_available():
+            # The ONNX/OpenVINO exports target CPU inference; on a GPU the
+            # torch model in reduced precision is much faster
+            logger.info(f"CUDA available, using torch reranker instead of {self.backend}")
+            self.backend = "torch"
+
+        if self.backend == "torch":
+            return self._load_torch_model()
+
+        try:
+            if self.backend == "onnx" and self.quantization == "int8" and self.onnx_path:
+                onnx_path = Path(self.onnx_path)
+                if not (onnx_path / QUANTIZED_ONNX_FILE).exists():
+                    export_onnx_reranker(self.model_name, onnx_path, self.quantization)
+                return CrossEncoder(
+                    str(onnx_path),
+                    backend="onnx",
+                    model_kwargs={"file_name": QUANTIZED_ONNX_FILE}
+                )
+
+            return CrossEncoder(self.model_name, backend=self.backend)
+
+        except Exception as e:
+            logger.warning(
+                f"Could not load {self.backend} reranker backend, using torch: {e}"
+            )
+            self.backend = "torch"
+            return self._load_torch_model()
+
+    def _load_torch_model(self) -> CrossEncoder:
+        """Load the torch cross-encoder in the configured dtype."""
+        dtype = resolve_model_dtype(self.model_dtype)
+        if dtype == torch.float32:
+            return CrossEncoder(self.model_name)
+
+        model = CrossEncoder(self.model_name, automodel_args={"torch_dtype": dtype})
+        # Score in float32 so downstream numpy conversion and thresholds are exact
+        model.model.register_forward_hook(upcast_logits)
+        return model
 
     def rerank(
         self,
         query: str,
         results: List[RetrievalResult],
         top_k: int = 5,
-        threshold: float = 0.0
+        threshold: float = 0.0,
+        no_cache: bool = False
     ) -> List[RankedResult]:
         """
         Re-rank retrieval results using cross-encoder.
@@ -42,55 +173,259 @@ class CrossEncoderReranker:
             results: Initial retrieval results
             top_k: Number of top results to return
             threshold: Minimum score threshold
+            no_cache: Always run the model instead of reusing cached scores
 
         Returns:
             Re-ranked results
         """
-        if not results:
-            return []
+        return self.rerank_batch([query], [results], top_k, threshold, no_cache)[0]
+
+    def rerank_stream(
+        self,
+        query: str,
+        results: List[RetrievalResult],
+        top_k: int = 5,
+        threshold: float = 0.0,
+        batch_size: Optional[int] = None,
+        no_cache: bool = False
+    ) -> Iterator[Tuple[int, int, List[RankedResult]]]:
+        """
+        Re-rank results incrementally, yielding the ranking so far after each batch.
+
+        The last ranking yielded is the same as ``rerank`` returns.
 
-        # Prepare pairs for cross-encoder
+        Args:
+            query: Search query
+            results: Initial retrieval results
+            top_k: Number of top results to return
+            threshold: Minimum score threshold
+            batch_size: Pairs scored per step (defaults to STREAM_BATCH_SIZE)
+            no_cache: Always run the model instead of reusing cached scores
+
+        Yields:
+            (results scored, total results, top results among those scored)
+        """
+        total = len(results)
+        if not total or _LITERAL_QUERY_RE.match(query.strip()):
+            yield total, total, self._keep_order(results, top_k)
+            return
+
+        batch_size = batch_size or self.STREAM_BATCH_SIZE
+        scores = np.empty(total, dtype=np.float32)
+        for start in range(0, total, batch_size):
+            end = min(start + batch_size, total)
+            pairs = [
+                (query, result.chunk.content[:self.MAX_PASSAGE_CHARS])
+                for result in results[start:end]
+            ]
+            scores[start:end] = self._predict_cached(pairs, no_cache)
+            yield end, total, self._rank(results[:end], scores[:end], top_k, threshold)
+
+    def rerank_batch(
+        self,
+        queries: List[str],
+        results_per_query: List[List[RetrievalResult]],
+        top_k: int = 5,
+        threshold: float = 0.0,
+        no_cache: bool = False
+    ) -> List[List[RankedResult]]:
+        """
+        Re-rank results for several queries with a single scoring pass.
+
+        Literal lookups (quoted strings, bare file names) keep their retrieval
+        order and skip the model.
+
+        Args:
+            queries: Search queries
+            results_per_query: Initial retrieval results for each query
+            top_k: Number of top results to return per query
+            threshold: Minimum score threshold
+            no_cache: Always run the model instead of reusing cached scores
+
+        Returns:
+            Re-ranked results for each query, in input order
+        """
+        scored = [
+            not _LITERAL_QUERY_RE.match(query.strip())
+            for query in queries
+        ]
         pairs = [
-            [query, result.chunk.content[:512]]  # Use first 512 chars
+            (query, result.chunk.content[:self.MAX_PASSAGE_CHARS])
+            for query, results, score in zip(queries, results_per_query, scored)
+            if score
             for result in results
         ]
+        scores = self._predict_cached(pairs, no_cache) if pairs else np.zeros(0)
+
+        # Split the flat score array back into per-query slices
+        ranked = []
+        offset = 0
+        for results, score in zip(results_per_query, scored):
+            if not score:
+                ranked.append(self._keep_order(results, top_k))
+                continue
+            query_scores = scores[offset:offset + len(results)]
+            offset += len(results)
+            ranked.append(self._rank(results, query_scores, top_k, threshold))
+
+        return ranked
+
+    def _predict_cached(self, pairs: List[Tuple[str, str]], no_cache: bool = False) -> np.ndarray:
+        """
+        Score pairs, running the model only on pairs without a live cached score.
+
+        Args:
+            pairs: List of (query, passage) pairs
+            no_cache: Bypass the cache entirely
 
-        # Score in batches
-        scores = []
-        for i in range(0, len(pairs), self.batch_size):
-            batch = pairs[i:i + self.batch_size]
-            batch_scores = self.model.predict(batch)
-            scores.extend(batch_scores)
+        Returns:
+            Array of cross-encoder scores
+        """
+        if no_cache:
+            return self._predict_pairs(pairs)
+
+        now = time.time()
+        scores = np.empty(len(pairs), dtype=np.float32)
+        misses = []
+        with self._score_cache_lock:
+            for i, pair in enumerate(pairs):
+                cached = self._score_cache.get(pair)
+                if cached is not None and cached[1] > now:
+                    self._score_cache.move_to_end(pair)
+                    scores[i] = cached[0]
+                else:
+                    misses.append(i)
+
+        if misses:
+            miss_scores = self._predict_pairs([pairs[i] for i in misses])
+            expires_at = now + self.SCORE_CACHE_TTL
+            with self._score_cache_lock:
+                for i, score in zip(misses, miss_scores):
+                    scores[i] = score
+                    self._score_cache[pairs[i]] = (float(score), expires_at)
+                    self._score_cache.move_to_end(pairs[i])
+
+                while len(self._score_cache) > self.SCORE_CACHE_SIZE:
+                    self._score_cache.popitem(last=False)
+
+        return scores
 
-        # Combine with original results
-        ranked_pairs = [
-            (result, score) for result, score in zip(results, scores)
+    @staticmethod
+    def _keep_order(results: List[RetrievalResult], top_k: int) -> List[RankedResult]:
+        """Wrap the first top_k results, keeping their retrieval order and scores."""
+        return [
+            RankedResult(
+                result=result,
+                reranker_score=result.relevance_score,
+                final_score=result.relevance_score
+            )
+            for result in results[:top_k]
         ]
 
-        # Sort by cross-encoder score
-        ranked_pairs.sort(key=lambda x: x[1], reverse=True)
+    @staticmethod
+    def _rank(
+        results: List[RetrievalResult],
+        scores: np.ndarray,
+        top_k: int,
+        threshold: float
+    ) -> List[RankedResult]:
+        """Sort results by cross-encoder score and apply threshold and top_k."""
+        scores = np.asarray(scores, dtype=np.float32)
+        if top_k <= 0:
+            return []
 
-        # Filter by threshold and top_k
-        ranked_results = []
-        for result, ce_score in ranked_pairs:
-            if ce_score < threshold:
-                break
+        # Select the top_k candidates in O(n), then sort only those
+        if len(scores) > top_k:
+            top_idx = np.argpartition(scores, -top_k)[-top_k:]
+        else:
+            top_idx = np.arange(len(scores))
+        top_idx = top_idx[scores[top_idx] >= threshold]
+        # Highest score first; ties keep retrieval order
+        top_idx = top_idx[np.lexsort((top_idx, -scores[top_idx]))]
+
+        # Calculate final score as weighted combination
+        relevance = np.array(
+            [results[i].relevance_score for i in top_idx.tolist()],
+            dtype=np.float32
+        )
+        ce_scores = scores[top_idx]
+        final_scores = 0.7 * ce_scores + 0.3 * relevance
+
+        return [
+            RankedResult(
+                result=results[i],
+                reranker_score=ce_score,
+                final_score=final_score
+            )
+            for i, ce_score, final_score in zip(
+                top_idx.tolist(), ce_scores.tolist(), final_scores.tolist()
+            )
+        ]
 
-            # Calculate final score as weighted combination
-            final_score = 0.7 * ce_score + 0.3 * result.relevance_score
+    def _predict_pairs(self, pairs: List[Tuple[str, str]]) -> np.ndarray:
+        """
+        Score query/passage pairs, tokenizing all pairs in a single call.
 
-            ranked_results.append(
-                RankedResult(
-                    result=result,
-                    reranker_score=float(ce_score),
-                    final_score=float(final_score)
-                )
-            )
+        Pairs are batched in order of token length, so each batch is padded
+        only to the longest pair among similarly sized ones.
 
-            if len(ranked_results) >= top_k:
-                break
+        Args:
+            pairs: List of (query, passage) pairs
 
-        return ranked_results
+        Returns:
+            Array of cross-encoder scores
+        """
+        if self.backend != "torch":
+            return self.model.predict(pairs, batch_size=self.batch_size)
+
+        queries = [pair[0] for pair in pairs]
+        max_length = self.model.max_length or 512
+        # Truncate only the passage so the query is always seen in full,
+        # unless a query could itself use up most of the token budget
+        truncation = (
+            "only_second"
+            if max(len(query) for query in queries) < max_length // 2
+            else "longest_first"
+        )
+        features = self.model.tokenizer(
+            queries,
+            [pair[1] for pair in pairs],
+            padding=True,
+            truncation=truncation,
+            max_length=max_length,
+            return_tensors="pt"
+        )
+
+        model = self.model.model
+        device = next(model.parameters()).device
+        activation = (
+            getattr(self.model, "activation_fn", None)
+            or getattr(self.model, "default_activation_function", None)
+            or torch.nn.Identity()
+        )
+
+        lengths = features["attention_mask"].sum(dim=1)
+        order = torch.argsort(lengths, stable=True)
+
+        scores = None
+        with torch.inference_mode():
+            for i in range(0, len(pairs), self.batch_size):
+                # Trim padding to the longest sequence in this slice
+                batch_idx = order[i:i + self.batch_size]
+                width = int(lengths[batch_idx].max())
+                batch = {
+                    key: value[batch_idx, :width].to(device)
+                    for key, value in features.items()
+                }
+                logits = activation(model(**batch).logits)
+                if logits.shape[-1] == 1:
+                    logits = logits.squeeze(-1)
+                batch_scores = logits.float().cpu().numpy()
+                if scores is None:
+                    scores = np.empty((len(pairs),) + batch_scores.shape[1:], dtype=np.float32)
+                scores[batch_idx.numpy()] = batch_scores
+
+        return scores
 
     def batch_rerank(
         self,
@@ -249,25 +584,37 @@ class EnsembleReranker:
         # Get cross-encoder scores
         ce_results = self.ce_reranker.rerank(query, results, top_k * 2)
 
-        # Calculate ensemble scores
-        ensemble_results = []
-        for ranked_result in ce_results:
-            final_score = (
-                weights["cross_encoder"] * ranked_result.reranker_score +
-                weights["semantic"] * ranked_result.result.relevance_score
-            )
-
-            # Bonus for metadata matches
-            metadata_bonus = 0.0
-            if ranked_result.result.chunk.metadata:
-                metadata_bonus = weights["metadata"]
-
-            final_score += metadata_bonus
+        if not ce_results:
+            return []
 
+        # Calculate ensemble scores for all candidates at once, with a bonus
+        # for chunks carrying metadata
+        ce_scores = np.fromiter(
+            (r.reranker_score for r in ce_results), dtype=np.float64, count=len(ce_results)
+        )
+        relevance = np.fromiter(
+            (r.result.relevance_score for r in ce_results), dtype=np.float64, count=len(ce_results)
+        )
+        has_metadata = np.fromiter(
+            (bool(r.result.chunk.metadata) for r in ce_results), dtype=bool, count=len(ce_results)
+        )
+        final_scores = (
+            weights["cross_encoder"] * ce_scores
+            + weights["semantic"] * relevance
+            + weights["metadata"] * has_metadata
+        )
+
+        # Select the top_k candidates in O(n), then sort only those by final
+        # score; ties keep cross-encoder order
+        if len(final_scores) > top_k:
+            order = np.argpartition(-final_scores, top_k)[:top_k]
+        else:
+            order = np.arange(len(final_scores))
+        order = order[np.lexsort((order, -final_scores[order]))]
+        ensemble_results = []
+        for i, final_score in zip(order.tolist(), final_scores[order].tolist()):
+            ranked_result = ce_results[i]
             ranked_result.final_score = final_score
             ensemble_results.append(ranked_result)
 
-        # Sort by final score
-        ensemble_results.sort(key=lambda x: x.final_score, reverse=True)
-
-        return ensemble_results[:top_k]
+        return ensemble_results
@@ -0,0 +1,435 @@
+"""BM25 inverted index for keyword retrieval over code chunks."""
+from bisect import bisect_right
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+import math
+import re
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+from src.utils.models import CodeChunk
+
+_IDENTIFIER_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+_SUBWORD_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+
+# Inflectional suffixes stripped by the stemmer, longest first
+_STEM_SUFFIXES = (
+    "ations", "ation", "ating", "ated", "ates", "ate",
+    "ings", "ing", "ers", "er", "ed", "es", "s", "e"
+)
+_MIN_STEM_LENGTH = 3
+
+
+@lru_cache(maxsize=65536)
+def stem(term: str) -> str:
+    """
+    Reduce a lowercase term to a crude stem.
+
+    Strips one inflectional suffix so that, e.g., "authentication" and
+    "authenticate" or "parser" and "parsing" share a term.
+
+    Args:
+        term: Lowercase term
+
+    Returns:
+        Stemmed term
+    """
+    if term.endswith("ss"):
+        return term
+    for suffix in _STEM_SUFFIXES:
+        if term.endswith(suffix) and len(term) - len(suffix) >= _MIN_STEM_LENGTH:
+            return term[:-len(suffix)]
+    return term
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Tokenize code or a query into lowercase terms.
+
+    Identifiers are kept whole and also split into their snake_case /
+    camelCase parts, so "authenticate_user" matches "user". Terms are also
+    emitted in stemmed form, so "authentication" matches "authenticate"
+    while exact matches still score higher.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of terms
+    """
+    terms = []
+    for identifier in _IDENTIFIER_RE.findall(text):
+        terms.append(identifier.lower())
+        parts = _SUBWORD_RE.findall(identifier)
+        if len(parts) > 1:
+            terms.extend(part.lower() for part in parts)
+
+    tokens = []
+    for term in terms:
+        tokens.append(term)
+        stemmed = stem(term)
+        if stemmed != term:
+            tokens.append(stemmed)
+    return tokens
+
+
+def _accumulate_term_scores(
+    scores: np.ndarray,
+    docs: np.ndarray,
+    freqs: np.ndarray,
+    doc_lengths: np.ndarray,
+    idf: float,
+    k1: float,
+    b: float,
+    avg_doc_length: float
+) -> None:
+    """Add one term's BM25 contribution to every document in its postings."""
+    for i in range(len(docs)):
+        doc = docs[i]
+        freq = freqs[i]
+        length_norm = 1.0 - b + b * doc_lengths[doc] / avg_doc_length
+        scores[doc] += idf * freq * (k1 + 1.0) / (freq + k1 * length_norm)
+
+
+if NUMBA_AVAILABLE:
+    # One fused native loop per term instead of several temporary arrays
+    _accumulate_term_scores = njit(cache=True, nogil=True)(_accumulate_term_scores)
+    # Compile at import so the first query doesn't pay for it
+    _accumulate_term_scores(
+        np.zeros(1, dtype=np.float32),
+        np.zeros(1, dtype=np.int32),
+        np.ones(1, dtype=np.float32),
+        np.ones(1, dtype=np.float32),
+        1.0, 1.5, 0.75, 1.0
+    )
+
+
+class _NameIndex:
+    """Maps substrings of function or class names to the documents carrying them."""
+
+    def __init__(self, names: Sequence[Optional[str]] = ()):
+        """
+        Index one name per document.
+
+        Args:
+            names: Name of each document (None or empty for no name)
+        """
+        self.docs: List[np.ndarray] = []
+        self.positions: Dict[str, int] = {}
+        # All distinct names in one string, so each query term is located with
+        # str.find instead of a Python loop over every name
+        self.text = ""
+        self.starts: List[int] = []
+        self._add(names, 0)
+
+    def extended(self, names: Sequence[Optional[str]], start: int) -> "_NameIndex":
+        """
+        Build a copy with names of appended documents added.
+
+        Args:
+            names: Name of each new document
+            start: Position of the first new document
+
+        Returns:
+            New name index; this one is left unchanged
+        """
+        index = _NameIndex()
+        index.docs = list(self.docs)
+        index.positions = dict(self.positions)
+        index.text = self.text
+        index.starts = list(self.starts)
+        index._add(names, start)
+        return index
+
+    def _add(self, names: Sequence[Optional[str]], start: int) -> None:
+        """Add names of documents numbered from ``start``."""
+        doc_ids: Dict[str, List[int]] = {}
+        for doc_id, name in enumerate(names, start):
+            if name:
+                doc_ids.setdefault(name.lower(), []).append(doc_id)
+
+        new_names = []
+        for name, ids in doc_ids.items():
+            ids = np.array(ids, dtype=np.int32)
+            position = self.positions.get(name)
+            if position is None:
+                self.positions[name] = len(self.docs)
+                self.docs.append(ids)
+                new_names.append(name)
+            else:
+                self.docs[position] = np.concatenate([self.docs[position], ids])
+
+        if not new_names:
+            return
+        parts = [self.text] if self.starts else []
+        offset = len(self.text) + 1 if self.starts else 0
+        for name in new_names:
+            self.starts.append(offset)
+            offset += len(name) + 1
+        self.text = "\n".join(parts + new_names)
+
+    def match(self, terms: Sequence[str]) -> np.ndarray:
+        """
+        Find documents whose name contains any of the terms.
+
+        Args:
+            terms: Lowercase terms without newlines
+
+        Returns:
+            Distinct matching document positions
+        """
+        matched = set()
+        for term in terms:
+            pos = self.text.find(term)
+            while pos != -1:
+                name_idx = bisect_right(self.starts, pos) - 1
+                matched.add(name_idx)
+                if name_idx + 1 == len(self.starts):
+                    break
+                pos = self.text.find(term, self.starts[name_idx + 1])
+
+        if not matched:
+            return np.zeros(0, dtype=np.int32)
+        # Each document has one name, so the posting arrays are disjoint
+        return np.concatenate([self.docs[idx] for idx in matched])
+
+
+class BM25Index:
+    """Okapi BM25 index with per-term posting arrays."""
+
+    # Bumped whenever tokenize() or the pickled layout changes, so stale
+    # indexes are rebuilt on load
+    TOKENIZER_VERSION = 3
+
+    # Class-level defaults so indexes pickled by older versions still load
+    function_names: Optional[_NameIndex] = None
+    class_names: Optional[_NameIndex] = None
+    tokenizer_version = 1
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Initialize an empty BM25 index.
+
+        Args:
+            k1: Term frequency saturation parameter
+            b: Document length normalization parameter
+        """
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self.doc_lengths = np.zeros(0, dtype=np.float32)
+        self.avg_doc_length = 0.0
+
+    @classmethod
+    def from_chunks(cls, chunks: Sequence[CodeChunk], **kwargs) -> "BM25Index":
+        """
+        Build an index over chunk contents.
+
+        Args:
+            chunks: Code chunks, indexed by position
+            **kwargs: BM25 parameters
+
+        Returns:
+            Built BM25 index
+        """
+        # Gather both columns in one pass; chunks loaded from disk are
+        # decoded on access, so a second traversal would decode them again
+        contents = []
+        function_names = []
+        class_names = []
+        for chunk in chunks:
+            contents.append(chunk.content)
+            function_names.append(chunk.function_name)
+            class_names.append(chunk.class_name)
+
+        index = cls(**kwargs)
+        index.build(contents)
+        index.build_names(function_names, class_names)
+        return index
+
+    def add_chunks(self, chunks: Sequence[CodeChunk]) -> "BM25Index":
+        """
+        Build a copy of the index with chunks appended as new documents.
+
+        Only postings of terms that occur in the new chunks are copied, so the
+        cost follows the new chunks rather than the corpus, and existing
+        chunks are never read. This index is left unchanged for searches
+        still using it.
+
+        Args:
+            chunks: Chunks to append, in index order
+
+        Returns:
+            Extended BM25 index
+        """
+        start = self.num_docs
+        doc_ids, term_freqs, doc_lengths = self._count_terms(
+            [chunk.content for chunk in chunks], start
+        )
+
+        postings = dict(self.postings)
+        for term, ids in doc_ids.items():
+            docs = np.array(ids, dtype=np.int32)
+            freqs = np.array(term_freqs[term], dtype=np.float32)
+            if term in postings:
+                old_docs, old_freqs = postings[term]
+                docs = np.concatenate([old_docs, docs])
+                freqs = np.concatenate([old_freqs, freqs])
+            postings[term] = (docs, freqs)
+
+        index = BM25Index(self.k1, self.b)
+        index.postings = postings
+        index.doc_lengths = np.concatenate([
+            self.doc_lengths, np.array(doc_lengths, dtype=np.float32)
+        ])
+        index.avg_doc_length = float(index.doc_lengths.mean()) if index.num_docs else 0.0
+        index.tokenizer_version = self.tokenizer_version
+
+        for kind in ("function_name", "class_name"):
+            names = [getattr(chunk, kind) for chunk in chunks]
+            name_index = getattr(self, f"{kind}s")
+            if name_index is None:
+                name_index = _NameIndex([None] * start + names)
+            else:
+                name_index = name_index.extended(names, start)
+            setattr(index, f"{kind}s", name_index)
+
+        return index
+
+    @property
+    def num_docs(self) -> int:
+        """Number of indexed documents."""
+        return len(self.doc_lengths)
+
+    def build(self, texts: List[str]) -> None:
+        """
+        Build postings for a list of documents.
+
+        Args:
+            texts: Document texts
+        """
+        doc_ids, term_freqs, doc_lengths = self._count_terms(texts, 0)
+
+        self.postings = {
+            term: (
+                np.array(doc_ids[term], dtype=np.int32),
+                np.array(term_freqs[term], dtype=np.float32)
+            )
+            for term in doc_ids
+        }
+        self.doc_lengths = np.array(doc_lengths, dtype=np.float32)
+        self.avg_doc_length = float(self.doc_lengths.mean()) if doc_lengths else 0.0
+        self.tokenizer_version = self.TOKENIZER_VERSION
+
+    @staticmethod
+    def _count_terms(
+        texts: Sequence[str],
+        start: int
+    ) -> Tuple[Dict[str, List[int]], Dict[str, List[int]], List[int]]:
+        """
+        Tokenize documents into per-term document ids and frequencies.
+
+        Args:
+            texts: Document texts
+            start: Position of the first document
+
+        Returns:
+            Document ids per term, frequencies per term, and document lengths
+        """
+        doc_ids: Dict[str, List[int]] = {}
+        term_freqs: Dict[str, List[int]] = {}
+        doc_lengths = []
+
+        for doc_id, text in enumerate(texts, start):
+            tokens = tokenize(text)
+            doc_lengths.append(len(tokens))
+            for term, freq in Counter(tokens).items():
+                doc_ids.setdefault(term, []).append(doc_id)
+                term_freqs.setdefault(term, []).append(freq)
+
+        return doc_ids, term_freqs, doc_lengths
+
+    def build_names(
+        self,
+        function_names: Sequence[Optional[str]],
+        class_names: Sequence[Optional[str]]
+    ) -> None:
+        """
+        Index function and class names, used for name boosts.
+
+        Args:
+            function_names: Function name of each document, in document order
+            class_names: Class name of each document, in document order
+        """
+        self.function_names = _NameIndex(function_names)
+        self.class_names = _NameIndex(class_names)
+
+    def get_scores(self, query: str, name_boost: float = 0.0) -> np.ndarray:
+        """
+        Score every document against a query.
+
+        Args:
+            query: Query text
+            name_boost: Score added once for a function name and once for a
+                class name containing a query term (as a substring)
+
+        Returns:
+            Array of BM25 scores indexed by document position
+        """
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        if not self.num_docs:
+            return scores
+
+        if name_boost:
+            query_terms = query.lower().split()
+            for names in (self.function_names, self.class_names):
+                if names is not None:
+                    scores[names.match(query_terms)] += name_boost
+
+        for term in set(tokenize(query)):
+            if term not in self.postings:
+                continue
+
+            docs, freqs = self.postings[term]
+            idf = math.log(1 + (self.num_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            if NUMBA_AVAILABLE:
+                _accumulate_term_scores(
+                    scores, docs, freqs, self.doc_lengths,
+                    idf, float(self.k1), float(self.b), self.avg_doc_length
+                )
+            else:
+                length_norm = 1 - self.b + self.b * self.doc_lengths[docs] / self.avg_doc_length
+                scores[docs] += idf * freqs * (self.k1 + 1) / (freqs + self.k1 * length_norm)
+
+        return scores
+
+    def search(
+        self,
+        query: str,
+        k: int = 10,
+        name_boost: float = 0.0
+    ) -> List[Tuple[int, float]]:
+        """
+        Get the top-k matching documents.
+
+        Args:
+            query: Query text
+            k: Number of results to return
+            name_boost: Score added for function or class name matches
+
+        Returns:
+            List of (document position, score) pairs sorted by score
+        """
+        scores = self.get_scores(query, name_boost)
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k)[:k]]
+
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(idx), float(scores[idx])) for idx in candidates]
@@ -0,0 +1,287 @@
+"""On-disk chunk storage that decodes chunks only when they are accessed."""
+from dataclasses import fields
+from datetime import datetime
+from functools import cached_property
+from itertools import chain
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Sequence
+import json
+import mmap
+import os
+import numpy as np
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+from src.utils.models import CodeChunk
+
+CHUNKS_FILE = "chunks.jsonl"
+OFFSETS_FILE = "chunks.offsets.npy"
+COLUMNS_FILE = "chunks.columns.npz"
+
+_CHUNK_FIELDS = [f.name for f in fields(CodeChunk)]
+
+
+def _dumps(record: Dict[str, Any]) -> bytes:
+    """Serialize a chunk record to one JSON line."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(record) + b"\n"
+    return json.dumps(record, default=str).encode("utf-8") + b"\n"
+
+
+def _loads(line: bytes) -> Dict[str, Any]:
+    """Deserialize one JSON line."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(line)
+    return json.loads(line)
+
+
+def _decode_chunk(line: bytes) -> CodeChunk:
+    """Rebuild a chunk from its JSON line."""
+    record = _loads(line)
+    # Stores written before created_at became a timestamp hold ISO strings
+    if isinstance(record["created_at"], str):
+        record["created_at"] = datetime.fromisoformat(record["created_at"]).timestamp()
+    return CodeChunk(**record)
+
+
+def _location_columns(
+    file_paths: Sequence[str],
+    start_lines: Sequence[int],
+    end_lines: Sequence[int]
+) -> Dict[str, np.ndarray]:
+    """Build the columnar location arrays, storing each file path once."""
+    paths, path_ids = np.unique(np.array(file_paths, dtype=str), return_inverse=True)
+    return {
+        "paths": paths,
+        "path_ids": path_ids.astype(np.int32),
+        "start_lines": np.array(start_lines, dtype=np.int32),
+        "end_lines": np.array(end_lines, dtype=np.int32)
+    }
+
+
+def write_chunks(path: Path, chunks: Iterable[CodeChunk]) -> None:
+    """
+    Write chunks as JSON lines plus an offsets array for random access.
+
+    Chunk locations are also written as columns, so bulk lookups such as
+    the set of indexed files don't decode every chunk.
+
+    Files are written to temporary names and then renamed, so an existing
+    store mapped from the same directory keeps reading its old data.
+
+    Args:
+        path: Index directory
+        chunks: Chunks to write, in index order
+    """
+    path = Path(path)
+    offsets = [0]
+    file_paths, start_lines, end_lines = [], [], []
+    chunks_tmp = path / f"{CHUNKS_FILE}.tmp"
+    with open(chunks_tmp, "wb") as f:
+        for chunk in chunks:
+            line = _dumps({name: getattr(chunk, name) for name in _CHUNK_FIELDS})
+            f.write(line)
+            offsets.append(offsets[-1] + len(line))
+            file_paths.append(chunk.file_path)
+            start_lines.append(chunk.start_line)
+            end_lines.append(chunk.end_line)
+
+    # np.save appends ".npy" to names without it
+    offsets_tmp = path / f"{OFFSETS_FILE}.tmp.npy"
+    np.save(offsets_tmp, np.array(offsets, dtype=np.int64))
+    columns_tmp = path / f"{COLUMNS_FILE[:-len('.npz')]}.tmp.npz"
+    np.savez(columns_tmp, **_location_columns(file_paths, start_lines, end_lines))
+
+    os.replace(chunks_tmp, path / CHUNKS_FILE)
+    os.replace(offsets_tmp, path / OFFSETS_FILE)
+    os.replace(columns_tmp, path / COLUMNS_FILE)
+
+
+class ChunkStore(Sequence[CodeChunk]):
+    """Read-only sequence of chunks backed by a memory-mapped JSON lines file."""
+
+    def __init__(self, path: Path):
+        """
+        Open a chunk store written by ``write_chunks``.
+
+        Args:
+            path: Index directory
+        """
+        self.path = Path(path)
+        self.offsets = np.load(self.path / OFFSETS_FILE, mmap_mode="r")
+        self._file = open(self.path / CHUNKS_FILE, "rb")
+        # mmap cannot map an empty file
+        self._data = (
+            mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if len(self) else b""
+        )
+
+    @staticmethod
+    def exists(path: Path) -> bool:
+        """Check whether a chunk store has been written to a directory."""
+        path = Path(path)
+        return (path / CHUNKS_FILE).exists() and (path / OFFSETS_FILE).exists()
+
+    @cached_property
+    def _columns(self) -> Dict[str, np.ndarray]:
+        """Location columns, read from disk or rebuilt for older stores."""
+        columns_path = self.path / COLUMNS_FILE
+        if columns_path.exists():
+            with np.load(columns_path) as data:
+                return {name: data[name] for name in data.files}
+
+        chunks = list(self)
+        return _location_columns(
+            [chunk.file_path for chunk in chunks],
+            [chunk.start_line for chunk in chunks],
+            [chunk.end_line for chunk in chunks]
+        )
+
+    @property
+    def file_paths(self) -> np.ndarray:
+        """Sorted unique file paths of the stored chunks."""
+        return self._columns["paths"]
+
+    @property
+    def path_ids(self) -> np.ndarray:
+        """Index into ``file_paths`` for each chunk."""
+        return self._columns["path_ids"]
+
+    @property
+    def start_lines(self) -> np.ndarray:
+        """Start line of each chunk."""
+        return self._columns["start_lines"]
+
+    @property
+    def end_lines(self) -> np.ndarray:
+        """End line of each chunk."""
+        return self._columns["end_lines"]
+
+    def file_path(self, idx: int) -> str:
+        """Get a chunk's file path without decoding the chunk."""
+        return str(self.file_paths[self.path_ids[idx]])
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("chunk index out of range")
+
+        start, end = int(self.offsets[idx]), int(self.offsets[idx + 1])
+        return _decode_chunk(self._data[start:end])
+
+    def __iter__(self) -> Iterator[CodeChunk]:
+        for start, end in zip(self.offsets[:-1].tolist(), self.offsets[1:].tolist()):
+            yield _decode_chunk(self._data[start:end])
+
+    def close(self) -> None:
+        """Release the memory map and file handle."""
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+
+class AppendedChunks(Sequence[CodeChunk]):
+    """A chunk store followed by chunks not yet written to it."""
+
+    def __init__(self, store: ChunkStore, added: List[CodeChunk]):
+        """
+        Wrap a store and the chunks appended after it.
+
+        Args:
+            store: Chunks already on disk
+            added: Chunks following the store, in index order
+        """
+        self.store = store
+        self.added = added
+
+    def __len__(self) -> int:
+        return len(self.store) + len(self.added)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("chunk index out of range")
+
+        if idx < len(self.store):
+            return self.store[idx]
+        return self.added[idx - len(self.store)]
+
+    def __iter__(self) -> Iterator[CodeChunk]:
+        return chain(self.store, self.added)
+
+    @property
+    def file_paths(self) -> np.ndarray:
+        """Sorted unique file paths of all chunks."""
+        return np.union1d(
+            self.store.file_paths,
+            np.array([chunk.file_path for chunk in self.added], dtype=str)
+        )
+
+
+def append_chunks(store: ChunkStore, chunks: Sequence[CodeChunk]) -> None:
+    """
+    Append chunks to the files of a store, after the chunks the store holds.
+
+    Existing lines are not rewritten. The new lines are written first and
+    the offsets and columns are replaced afterwards, so readers of the store
+    never see a partial update; lines left past the end by an interrupted
+    append are overwritten by the next one.
+
+    Args:
+        store: Open store whose directory receives the chunks
+        chunks: Chunks to append, in index order
+    """
+    path = store.path
+    offsets = [int(store.offsets[-1])]
+    file_paths, start_lines, end_lines = [], [], []
+    with open(path / CHUNKS_FILE, "r+b") as f:
+        # Drop lines left by an interrupted append; truncating only when
+        # needed keeps the common case safe for files mapped elsewhere
+        if f.seek(0, os.SEEK_END) != offsets[0]:
+            f.truncate(offsets[0])
+        f.seek(offsets[0])
+        for chunk in chunks:
+            line = _dumps({name: getattr(chunk, name) for name in _CHUNK_FIELDS})
+            f.write(line)
+            offsets.append(offsets[-1] + len(line))
+            file_paths.append(chunk.file_path)
+            start_lines.append(chunk.start_line)
+            end_lines.append(chunk.end_line)
+
+    # Merge the path dictionaries and remap existing ids without decoding
+    # any chunk
+    new_columns = _location_columns(file_paths, start_lines, end_lines)
+    paths = np.union1d(store.file_paths, new_columns["paths"])
+    old_ids = np.searchsorted(paths, store.file_paths)[store.path_ids]
+    new_ids = np.searchsorted(paths, new_columns["paths"])[new_columns["path_ids"]]
+    columns = {
+        "paths": paths,
+        "path_ids": np.concatenate([old_ids, new_ids]).astype(np.int32),
+        "start_lines": np.concatenate([store.start_lines, new_columns["start_lines"]]),
+        "end_lines": np.concatenate([store.end_lines, new_columns["end_lines"]])
+    }
+
+    offsets_tmp = path / f"{OFFSETS_FILE}.tmp.npy"
+    np.save(offsets_tmp, np.concatenate([
+        np.asarray(store.offsets), np.array(offsets[1:], dtype=np.int64)
+    ]))
+    columns_tmp = path / f"{COLUMNS_FILE[:-len('.npz')]}.tmp.npz"
+    np.savez(columns_tmp, **columns)
+
+    os.replace(columns_tmp, path / COLUMNS_FILE)
+    os.replace(offsets_tmp, path / OFFSETS_FILE)
@@ -1,23 +1,59 @@
 """FAISS-based semantic retrieval module."""
-from typing import List, Optional, Tuple
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
 from pathlib import Path
+import os
 import pickle
+import threading
+import time
 import numpy as np
 
 import faiss
+import torch
 from sentence_transformers import SentenceTransformer
+from sentence_transformers.models import Pooling
+from tqdm import tqdm
 
+from src.retrieval.bm25 import BM25Index
+from src.retrieval.chunk_store import AppendedChunks, ChunkStore, append_chunks, write_chunks
 from src.utils.models import CodeChunk, RetrievalResult
 from src.utils.logger import logger
+from src.utils.precision import resolve_model_dtype, upcast_token_embeddings
 
 
 class SemanticRetriever:
     """Semantic retrieval using FAISS and sentence transformers."""
 
+    # Upper bound on vectors used to train IVF/PQ indexes
+    MAX_TRAIN_SIZE = 50_000
+    EMBEDDINGS_FILE = "embeddings.fp16.npy"
+    # Pickled chunk map written by older versions
+    LEGACY_CHUNKS_FILE = "chunks.pkl"
+
+    # Corpus sizes at which index_type="auto" moves from exact search to
+    # HNSW, and from HNSW to compressed IVF-PQ
+    AUTO_HNSW_MIN_SIZE = 10_000
+    AUTO_IVFPQ_MIN_SIZE = 1_000_000
+    HNSW_EF_CONSTRUCTION = 200
+    HNSW_EF_SEARCH = 64
+    # Texts encoded per call while building; each call length-sorts its
+    # inputs, so blocks much larger than the batch size keep padding low
+    ENCODE_BLOCK_SIZE = 4096
+    # Query embeddings kept for repeated queries
+    QUERY_CACHE_SIZE = 512
+    # Smallest index worth replicating to the GPU for search
+    GPU_MIN_SIZE = 50_000
+
     def __init__(
         self,
         model_name: str = "all-MiniLM-L6-v2",
-        index_path: Optional[Path] = None
+        index_path: Optional[Path] = None,
+        model_dtype: str = "float32",
+        index_type: str = "Flat",
+        nprobe: int = 16,
+        commit_batch_size: int = 256,
+        commit_interval: float = 30.0,
+        use_gpu: bool = True
     ):
         """
         Initialize the semantic retriever.
@@ -25,15 +61,59 @@ class SemanticRetriever:
         Args:
             model_name: HuggingFace model name for embeddings
             index_path: Path to save/load FAISS index
+            model_dtype: Weight dtype (float32, bfloat16, float16)
+            index_type: FAISS index factory string (e.g. "HNSW32,Flat"), or
+                "auto" to choose one from the corpus size
+            nprobe: Number of inverted lists probed per query for IVF indexes
+            commit_batch_size: Staged chunks that trigger an immediate commit
+            commit_interval: Seconds after which staged chunks are committed
+            use_gpu: Search on a GPU replica of the index when faiss-gpu and a
+                GPU are available
         """
         self.model_name = model_name
         self.index_path = index_path
+        self.index_type = index_type
+        self.nprobe = nprobe
+        self.commit_batch_size = commit_batch_size
+        self.commit_interval = commit_interval
         self.embedding_model = SentenceTransformer(model_name)
         self.embedding_dim = self.embedding_model.get_sentence_embedding_dimension()
 
-        self.faiss_index: Optional[faiss.IndexFlatL2] = None
-        self.chunk_map: List[CodeChunk] = []
+        self.model_dtype = resolve_model_dtype(model_dtype)
+        if self.model_dtype != torch.float32:
+            self.embedding_model.to(self.model_dtype)
+            # Pool and normalize in float32 to avoid low-precision accumulation
+            for module in self.embedding_model.modules():
+                if isinstance(module, Pooling):
+                    module.register_forward_pre_hook(upcast_token_embeddings)
+            logger.info(f"Embedding model loaded in {self.model_dtype}")
+
+        self.faiss_index: Optional[faiss.Index] = None
+        # GPU replica of faiss_index used for searching; the CPU index stays
+        # authoritative for saving and updates
+        self.gpu_index: Optional[faiss.Index] = None
+        self.gpu_resources = None
+        if use_gpu and hasattr(faiss, "StandardGpuResources") and faiss.get_num_gpus() > 0:
+            self.gpu_resources = faiss.StandardGpuResources()
+        self.chunk_map: Sequence[CodeChunk] = []
         self.is_built = False
+        self.is_mmapped = False
+        self._mmapped_path: Optional[Path] = None
+        # Normalized float16 copy of the indexed vectors (sidecar file on disk)
+        self.embeddings: Optional[np.ndarray] = None
+        self.keyword_index: Optional[BM25Index] = None
+        # Changes whenever the indexed content does; see index_fingerprint
+        self._index_stamp = 0
+
+        # Chunks added by update_index wait here until the next commit
+        self._staging_chunks: List[CodeChunk] = []
+        self._staging_lock = threading.Lock()
+        self._commit_timer: Optional[threading.Timer] = None
+        # Serializes writers (commit, save); searches never take it
+        self._index_lock = threading.RLock()
+
+        self._query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._query_cache_lock = threading.Lock()
 
     def build_index(self, chunks: List[CodeChunk], batch_size: int = 32) -> None:
         """
@@ -48,27 +128,151 @@ class SemanticRetriever:
         # Prepare texts for embedding
         texts = [chunk.content for chunk in chunks]
 
-        # Compute embeddings in batches
-        embeddings = []
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            batch_embeddings = self.embedding_model.encode(
-                batch,
-                show_progress_bar=True,
-                convert_to_numpy=True
+        # Encode block by block into one preallocated array, so peak memory
+        # is the result plus one block instead of two full copies
+        embeddings_array = np.empty((len(texts), self.embedding_dim), dtype=np.float32)
+        with tqdm(total=len(texts), desc="Encoding", unit="chunk") as progress:
+            for start in range(0, len(texts), self.ENCODE_BLOCK_SIZE):
+                block = texts[start:start + self.ENCODE_BLOCK_SIZE]
+                embeddings_array[start:start + len(block)] = self.encode_batch(block, batch_size)
+                progress.update(len(block))
+
+        # Create, train and populate FAISS index
+        self.faiss_index = self._create_index(embeddings_array)
+        self.faiss_index.add(embeddings_array)
+        self.embeddings = embeddings_array.astype(np.float16)
+        self.is_mmapped = False
+        self.gpu_index = self._to_gpu(self.faiss_index, embeddings_array)
+
+        self._close_chunk_store()
+        self.chunk_map = chunks
+        self.keyword_index = BM25Index.from_chunks(chunks)
+        self._index_stamp = time.time_ns()
+        self.is_built = True
+
+        logger.info(f"FAISS index built successfully with {len(chunks)} chunks")
+
+    def index_fingerprint(self) -> str:
+        """
+        Identify the current index contents, so caches keyed on it go stale on reindex.
+
+        Processes that load the same saved index get the same fingerprint.
+
+        Returns:
+            Fingerprint string
+        """
+        ntotal = self.faiss_index.ntotal if self.faiss_index is not None else 0
+        return f"{ntotal}:{self._index_stamp}"
+
+    def indexed_files(self) -> List[str]:
+        """
+        Get the files that have chunks in the index.
+
+        Returns:
+            Sorted unique file paths
+        """
+        chunk_map = self.chunk_map
+        if isinstance(chunk_map, (ChunkStore, AppendedChunks)):
+            return chunk_map.file_paths.tolist()
+        return sorted({chunk.file_path for chunk in chunk_map})
+
+    def _create_index(self, embeddings: np.ndarray) -> faiss.Index:
+        """
+        Create and train an inner-product FAISS index for the embeddings.
+
+        Falls back to an exact flat index when the configured index type is
+        invalid for the embedding dimension or there are too few vectors to
+        train it.
+
+        Args:
+            embeddings: Normalized embedding matrix
+
+        Returns:
+            Trained (empty) FAISS index
+        """
+        logger.info(f"FAISS compile options: {faiss.get_compile_options()}")
+
+        index_type = self.index_type
+        if index_type == "auto":
+            index_type = self._auto_index_type(len(embeddings))
+            if index_type is None:
+                return self._create_flat_index()
+            logger.info(f"Using {index_type} index for {len(embeddings)} vectors")
+
+        try:
+            index = faiss.index_factory(
+                self.embedding_dim,
+                index_type,
+                faiss.METRIC_INNER_PRODUCT
             )
-            embeddings.append(batch_embeddings)
+        except RuntimeError as e:
+            logger.warning(f"Invalid FAISS index type '{index_type}': {e}")
+            return self._create_flat_index()
+
+        if hasattr(index, "hnsw"):
+            index.hnsw.efConstruction = self.HNSW_EF_CONSTRUCTION
+            self._set_search_params(index)
+
+        if index.is_trained:
+            return index
+
+        try:
+            nlist = faiss.extract_index_ivf(index).nlist
+        except RuntimeError:
+            nlist = 1
+
+        # FAISS needs ~39 points per centroid and 256 for PQ codebooks
+        min_train_size = max(256, 39 * nlist)
+        if len(embeddings) < min_train_size:
+            logger.info(
+                f"{len(embeddings)} vectors is too few to train {index_type} "
+                f"(need {min_train_size}), using flat index"
+            )
+            return self._create_flat_index()
 
-        embeddings_array = np.vstack(embeddings)
+        logger.info(f"Training {index_type} index...")
+        index.train(embeddings[:self.MAX_TRAIN_SIZE])
+        self._set_search_params(index)
+        return index
 
-        # Create and populate FAISS index
-        self.faiss_index = faiss.IndexFlatL2(self.embedding_dim)
-        self.faiss_index.add(embeddings_array.astype(np.float32))
+    def _auto_index_type(self, num_vectors: int) -> Optional[str]:
+        """
+        Choose an index factory string for a corpus size.
 
-        self.chunk_map = chunks
-        self.is_built = True
+        Args:
+            num_vectors: Number of vectors to index
 
-        logger.info(f"FAISS index built successfully with {len(chunks)} chunks")
+        Returns:
+            Factory string, or None when exact search is fastest
+        """
+        if num_vectors < self.AUTO_HNSW_MIN_SIZE:
+            return None
+        if num_vectors < self.AUTO_IVFPQ_MIN_SIZE:
+            # int8 vectors: a quarter of the memory traffic of float32, and
+            # the reranker rescores the candidates anyway
+            return "HNSW32,SQ8"
+
+        # ~4*sqrt(N) lists, rounded to a power of two; 4 dims per PQ code
+        nlist = 1 << round(np.log2(4 * np.sqrt(num_vectors)))
+        return f"IVF{nlist}_HNSW32,PQ{self.embedding_dim // 4}"
+
+    def _create_flat_index(self) -> faiss.Index:
+        """Create an exact inner-product index storing vectors as float16."""
+        return faiss.IndexScalarQuantizer(
+            self.embedding_dim,
+            faiss.ScalarQuantizer.QT_fp16,
+            faiss.METRIC_INNER_PRODUCT
+        )
+
+    def _set_search_params(self, index: faiss.Index) -> None:
+        """Set query-time parameters on IVF (nprobe) and HNSW (efSearch) indexes."""
+        if hasattr(index, "hnsw"):
+            index.hnsw.efSearch = self.HNSW_EF_SEARCH
+
+        try:
+            faiss.extract_index_ivf(index).nprobe = self.nprobe
+        except RuntimeError:
+            pass  # Not an IVF index
 
     def search(
         self,
@@ -85,7 +289,8 @@ class SemanticRetriever:
             return_scores: Whether to return distance scores
 
         Returns:
-            List of retrieval results, optionally with scores
+            List of retrieval results, optionally with the raw FAISS
+            distances of those results, in the same order
         """
         if not self.is_built:
             logger.warning("FAISS index not built. Building from empty chunks...")
@@ -93,36 +298,177 @@ class SemanticRetriever:
             return []
 
         # Encode query
-        query_embedding = self.embedding_model.encode(
-            [query],
-            convert_to_numpy=True
-        )[0]
+        query_embedding = self._encode_queries([query])
 
         # Search
-        distances, indices = self.faiss_index.search(
-            np.array([query_embedding], dtype=np.float32),
-            k
-        )
+        distances, indices = self._search_index().search(query_embedding, k)
+        distances, indices = distances[0], indices[0]
+
+        if return_scores:
+            # Drop the ids _to_results drops, so scores line up with results;
+            # the chunk map only grows, so it keeps every id that passes here
+            valid = (indices >= 0) & (indices < len(self.chunk_map))
+            distances, indices = distances[valid], indices[valid]
+            return self._to_results(distances, indices), distances
+        return self._to_results(distances, indices)
+
+    def search_batch(
+        self,
+        queries: List[str],
+        k: int = 10,
+        batch_size: int = 32
+    ) -> List[List[RetrievalResult]]:
+        """
+        Search for several queries with one encode call and one FAISS search.
+
+        Args:
+            queries: Search queries
+            k: Number of results per query
+            batch_size: Batch size for query embedding
+
+        Returns:
+            List of retrieval results for each query, in input order
+        """
+        if not queries:
+            return []
+        if not self.is_built:
+            logger.warning("FAISS index not built")
+            return [[] for _ in queries]
+
+        query_embeddings = self._encode_queries(queries, batch_size)
+        distances, indices = self._search_index().search(query_embeddings, k)
+
+        return [
+            self._to_results(row_distances, row_indices)
+            for row_distances, row_indices in zip(distances, indices)
+        ]
+
+    def _search_index(self) -> faiss.Index:
+        """Index to run searches on: the GPU replica if there is one."""
+        gpu_index = self.gpu_index
+        return gpu_index if gpu_index is not None else self.faiss_index
+
+    def _to_gpu(
+        self,
+        index: faiss.Index,
+        embeddings: Optional[np.ndarray]
+    ) -> Optional[faiss.Index]:
+        """
+        Replicate an index to the GPU for searching.
+
+        Args:
+            index: CPU index
+            embeddings: Vectors held by the index, used when the index type
+                has no GPU counterpart
+
+        Returns:
+            GPU index, or None to search on the CPU index
+        """
+        if self.gpu_resources is None or index.ntotal < self.GPU_MIN_SIZE:
+            return None
+
+        options = faiss.GpuClonerOptions()
+        options.useFloat16 = True
+        try:
+            gpu_index = faiss.index_cpu_to_gpu(self.gpu_resources, 0, index, options)
+        except RuntimeError:
+            # Scalar-quantized flat indexes have no GPU version; search the
+            # same vectors exactly with a float16 GPU flat index instead
+            if not isinstance(index, faiss.IndexScalarQuantizer) or embeddings is None:
+                logger.info(f"{type(index).__name__} cannot run on GPU, searching on CPU")
+                return None
+            flat_index = faiss.IndexFlat(self.embedding_dim, index.metric_type)
+            flat_index.add(np.asarray(embeddings, dtype=np.float32))
+            gpu_index = faiss.index_cpu_to_gpu(self.gpu_resources, 0, flat_index, options)
+
+        logger.info(f"Searching {gpu_index.ntotal} vectors on GPU")
+        return gpu_index
+
+    def encode_batch(
+        self,
+        texts: List[str],
+        batch_size: int = 32,
+        normalize: bool = True
+    ) -> np.ndarray:
+        """
+        Embed texts in batches on the model's device.
 
-        # Convert distances to similarity scores (L2 distance to similarity)
-        scores = 1 / (1 + distances[0])
+        Args:
+            texts: Texts to embed
+            batch_size: Texts per forward pass
+            normalize: L2-normalize embeddings, so inner product is cosine
+                similarity
 
-        results = []
-        for idx, score in zip(indices[0], scores):
-            if idx < 0 or idx >= len(self.chunk_map):
-                continue
+        Returns:
+            float32 embeddings, one row per text
+        """
+        return self.embedding_model.encode(
+            texts,
+            batch_size=batch_size,
+            show_progress_bar=False,
+            convert_to_numpy=True,
+            normalize_embeddings=normalize
+        ).astype(np.float32, copy=False)
+
+    def _encode_queries(self, queries: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Embed queries, encoding each distinct uncached query only once.
 
-            chunk = self.chunk_map[int(idx)]
-            result = RetrievalResult(
-                chunk=chunk,
-                relevance_score=float(score),
+        Args:
+            queries: Search queries
+            batch_size: Batch size for query embedding
+
+        Returns:
+            Normalized float32 query embeddings, one row per query
+        """
+        embeddings = np.empty((len(queries), self.embedding_dim), dtype=np.float32)
+        missing = {}
+        with self._query_cache_lock:
+            for i, query in enumerate(queries):
+                cached = self._query_cache.get(query)
+                if cached is not None:
+                    self._query_cache.move_to_end(query)
+                    embeddings[i] = cached
+                else:
+                    missing.setdefault(query, []).append(i)
+
+        if missing:
+            encoded = self.encode_batch(list(missing), batch_size)
+
+            with self._query_cache_lock:
+                for (query, rows), embedding in zip(missing.items(), encoded):
+                    embeddings[rows] = embedding
+                    self._query_cache[query] = embedding
+                    self._query_cache.move_to_end(query)
+                while len(self._query_cache) > self.QUERY_CACHE_SIZE:
+                    self._query_cache.popitem(last=False)
+
+        return embeddings
+
+    def _to_results(
+        self,
+        distances: np.ndarray,
+        indices: np.ndarray
+    ) -> List[RetrievalResult]:
+        """Convert one row of FAISS output to retrieval results."""
+        if self.faiss_index.metric_type == faiss.METRIC_L2:
+            # Legacy L2 indexes: convert distance to similarity
+            scores = 1 / (1 + distances)
+        else:
+            # Inner product over normalized vectors is cosine similarity
+            scores = distances
+
+        # Drop padding (-1) and stale ids in one numpy pass, then convert to
+        # Python scalars once instead of per element
+        valid = (indices >= 0) & (indices < len(self.chunk_map))
+        return [
+            RetrievalResult(
+                chunk=self.chunk_map[idx],
+                relevance_score=score,
                 retrieval_type="semantic"
             )
-            results.append(result)
-
-        if return_scores:
-            return results, distances[0]
-        return results
+            for idx, score in zip(indices[valid].tolist(), scores[valid].tolist())
+        ]
 
     def save_index(self, path: Optional[Path] = None) -> None:
         """
@@ -139,21 +485,75 @@ class SemanticRetriever:
         save_path = Path(save_path)
         save_path.parent.mkdir(parents=True, exist_ok=True)
 
+        # Files are replaced atomically: the previous index may still be
+        # memory-mapped by in-flight searches
+        with self._index_lock:
+            self._save_files(save_path)
+
+        logger.info(f"Index saved to {save_path}")
+
+    def _save_files(self, save_path: Path) -> None:
+        """Write the index files to a directory."""
         # Save FAISS index
-        faiss.write_index(self.faiss_index, str(save_path / "index.faiss"))
+        index_tmp = self._tmp_path(save_path / "index.faiss")
+        faiss.write_index(self.faiss_index, str(index_tmp))
+        os.replace(index_tmp, save_path / "index.faiss")
+        # Match the fingerprint other processes see when they load this index
+        self._index_stamp = os.stat(save_path / "index.faiss").st_mtime_ns
+
+        # Save chunk map. A store already mapped from this path is kept, and
+        # chunks committed on top of it are appended to its files
+        chunk_map = self.chunk_map
+        if isinstance(chunk_map, AppendedChunks) and self._same_path(chunk_map.store.path, save_path):
+            append_chunks(chunk_map.store, chunk_map.added)
+            # The old store stays open for searches still reading it
+            self.chunk_map = ChunkStore(save_path)
+        elif not (isinstance(chunk_map, ChunkStore) and self._same_path(chunk_map.path, save_path)):
+            write_chunks(save_path, chunk_map)
+        (save_path / self.LEGACY_CHUNKS_FILE).unlink(missing_ok=True)
+
+        # Save keyword index
+        if self.keyword_index is not None:
+            bm25_tmp = self._tmp_path(save_path / "bm25.pkl")
+            with open(bm25_tmp, "wb") as f:
+                pickle.dump(self.keyword_index, f)
+            os.replace(bm25_tmp, save_path / "bm25.pkl")
+
+        # Save raw vectors so rebuilds and migrations don't need re-embedding
+        if self.embeddings is not None:
+            embeddings_tmp = self._tmp_path(save_path / self.EMBEDDINGS_FILE)
+            np.save(embeddings_tmp, np.asarray(self.embeddings))
+            os.replace(embeddings_tmp, save_path / self.EMBEDDINGS_FILE)
 
-        # Save chunk map
-        with open(save_path / "chunks.pkl", "wb") as f:
-            pickle.dump(self.chunk_map, f)
+    @staticmethod
+    def _same_path(a: Path, b: Path) -> bool:
+        """Check whether two paths name the same directory."""
+        return Path(a).resolve() == Path(b).resolve()
 
-        logger.info(f"Index saved to {save_path}")
+    @staticmethod
+    def _extend_chunk_map(
+        chunk_map: Sequence[CodeChunk],
+        new_chunks: List[CodeChunk]
+    ) -> Sequence[CodeChunk]:
+        """Append chunks to a chunk map without decoding stored chunks."""
+        if isinstance(chunk_map, AppendedChunks):
+            return AppendedChunks(chunk_map.store, chunk_map.added + new_chunks)
+        if isinstance(chunk_map, ChunkStore):
+            return AppendedChunks(chunk_map, list(new_chunks))
+        return [*chunk_map, *new_chunks]
+
+    @staticmethod
+    def _tmp_path(path: Path) -> Path:
+        """Temporary sibling of a file, keeping its suffix."""
+        return path.with_name(f"{path.stem}.tmp{path.suffix}")
 
-    def load_index(self, path: Optional[Path] = None) -> None:
+    def load_index(self, path: Optional[Path] = None, mmap: bool = False) -> None:
         """
         Load FAISS index and chunk map from disk.
 
         Args:
             path: Path to load index from (uses self.index_path if not provided)
+            mmap: Memory-map the index read-only instead of reading it into RAM
         """
         load_path = path or self.index_path
         if not load_path:
@@ -166,93 +566,206 @@ class SemanticRetriever:
             return
 
         # Load FAISS index
-        self.faiss_index = faiss.read_index(str(load_path / "index.faiss"))
-
-        # Load chunk map
-        with open(load_path / "chunks.pkl", "rb") as f:
-            self.chunk_map = pickle.load(f)
+        index_file = str(load_path / "index.faiss")
+        if mmap:
+            try:
+                self.faiss_index = faiss.read_index(
+                    index_file, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+                )
+            except RuntimeError as e:
+                logger.info(f"Index cannot be memory-mapped, reading it into RAM: {e}")
+                mmap = False
+        if not mmap:
+            self.faiss_index = faiss.read_index(index_file)
+        self.is_mmapped = mmap
+        self._mmapped_path = load_path if mmap else None
+        self._index_stamp = os.stat(index_file).st_mtime_ns
+        self._set_search_params(self.faiss_index)
+        if mmap:
+            self._disable_prefetch(self.faiss_index)
+
+        # Load chunk map; chunks are decoded lazily as results reference them
+        self._close_chunk_store()
+        if ChunkStore.exists(load_path):
+            self.chunk_map = ChunkStore(load_path)
+        else:
+            with open(load_path / self.LEGACY_CHUNKS_FILE, "rb") as f:
+                self.chunk_map = pickle.load(f)
+
+        self.keyword_index = None
+        bm25_path = load_path / "bm25.pkl"
+        if bm25_path.exists():
+            with open(bm25_path, "rb") as f:
+                self.keyword_index = pickle.load(f)
+            if self.keyword_index.tokenizer_version != BM25Index.TOKENIZER_VERSION:
+                logger.info("Keyword index was built by an older version, rebuilding")
+                self.keyword_index = None
+        if self.keyword_index is None:
+            self.keyword_index = BM25Index.from_chunks(self.chunk_map)
+
+        embeddings_path = load_path / self.EMBEDDINGS_FILE
+        self.embeddings = (
+            np.load(embeddings_path, mmap_mode="r") if embeddings_path.exists() else None
+        )
+        self.gpu_index = self._to_gpu(self.faiss_index, self.embeddings)
 
         self.is_built = True
         logger.info(f"Index loaded from {load_path}")
 
-    def update_index(self, new_chunks: List[CodeChunk]) -> None:
+    def _close_chunk_store(self) -> None:
+        """Release the memory-mapped chunk store, if one is loaded."""
+        if isinstance(self.chunk_map, AppendedChunks):
+            self.chunk_map.store.close()
+        elif isinstance(self.chunk_map, ChunkStore):
+            self.chunk_map.close()
+
+    @staticmethod
+    def _disable_prefetch(index: faiss.Index) -> None:
+        """Disable background prefetch threads on on-disk inverted lists."""
+        try:
+            invlists = faiss.downcast_InvertedLists(faiss.extract_index_ivf(index).invlists)
+        except RuntimeError:
+            return  # Not an IVF index
+
+        if isinstance(invlists, faiss.OnDiskInvertedLists):
+            invlists.prefetch_nthread = 0
+
+    def update_index(self, new_chunks: List[CodeChunk], commit: bool = False) -> None:
         """
-        Add new chunks to existing index.
+        Stage new chunks for the next commit.
+
+        Staged chunks are committed once commit_batch_size of them have
+        accumulated, or commit_interval seconds after the first one was
+        staged, so a burst of small updates costs one rebuild and one save.
+        The interval timer is a daemon thread, so short-lived processes
+        should pass commit=True (or call commit) before exiting.
 
         Args:
             new_chunks: New chunks to add
+            commit: Commit and save everything staged before returning
         """
         if not self.is_built:
             self.build_index(new_chunks)
             return
 
-        logger.info(f"Adding {len(new_chunks)} new chunks to index...")
+        with self._staging_lock:
+            self._staging_chunks.extend(new_chunks)
+            pending = len(self._staging_chunks)
+            if pending < self.commit_batch_size and self._commit_timer is None:
+                self._commit_timer = threading.Timer(self.commit_interval, self.commit)
+                self._commit_timer.daemon = True
+                self._commit_timer.start()
 
-        # Encode new chunks
-        texts = [chunk.content for chunk in new_chunks]
-        embeddings = self.embedding_model.encode(
-            texts,
-            show_progress_bar=True,
-            convert_to_numpy=True
-        )
+        logger.info(f"Staged {len(new_chunks)} chunks ({pending} pending)")
+        if commit or pending >= self.commit_batch_size:
+            self.commit()
 
-        # Add to FAISS index
-        self.faiss_index.add(embeddings.astype(np.float32))
-        self.chunk_map.extend(new_chunks)
+    def commit(self, save: bool = True) -> int:
+        """
+        Add staged chunks to a copy of the index and swap it in.
+
+        Encoding and index building happen off to the side, so searches keep
+        using the current index until the new one replaces it.
+
+        Args:
+            save: Save the committed index to self.index_path
 
-        logger.info(f"Index now contains {len(self.chunk_map)} chunks")
+        Returns:
+            Number of chunks committed
+        """
+        with self._staging_lock:
+            new_chunks, self._staging_chunks = self._staging_chunks, []
+            if self._commit_timer is not None:
+                self._commit_timer.cancel()
+                self._commit_timer = None
+
+        if not new_chunks:
+            return 0
+
+        with self._index_lock:
+            logger.info(f"Adding {len(new_chunks)} new chunks to index...")
+
+            # Encode new chunks
+            texts = [chunk.content for chunk in new_chunks]
+            embeddings = self.encode_batch(
+                texts,
+                normalize=self.faiss_index.metric_type == faiss.METRIC_INNER_PRODUCT
+            )
+
+            # FAISS indexes are not safe to add to while being searched
+            if self.is_mmapped:
+                # Read-only mappings cannot be extended; read a writable copy
+                new_index = faiss.read_index(str(self._mmapped_path / "index.faiss"))
+                self._set_search_params(new_index)
+            else:
+                new_index = faiss.clone_index(self.faiss_index)
+            new_index.add(embeddings)
+
+            # Stored chunks are neither decoded nor re-tokenized; only the
+            # new chunks are added to the chunk map and keyword index
+            chunk_map = self._extend_chunk_map(self.chunk_map, new_chunks)
+            if self.keyword_index is not None:
+                keyword_index = self.keyword_index.add_chunks(new_chunks)
+            else:
+                keyword_index = BM25Index.from_chunks(chunk_map)
+
+            # Chunk ids only ever grow, so searches that see the new chunk map
+            # with the old index (or the reverse) still resolve every id. The
+            # old chunk store is left open for searches still reading it.
+            all_embeddings = None
+            if self.embeddings is not None:
+                all_embeddings = np.vstack([self.embeddings, embeddings.astype(np.float16)])
+            gpu_index = self._to_gpu(new_index, all_embeddings)
+
+            self.chunk_map = chunk_map
+            self.keyword_index = keyword_index
+            self.embeddings = all_embeddings
+            self.gpu_index = gpu_index
+            self.faiss_index = new_index
+            self.is_mmapped = False
+            self._index_stamp = time.time_ns()
+
+            logger.info(f"Index now contains {len(self.chunk_map)} chunks")
+
+            if save and self.index_path:
+                self.save_index()
+
+        return len(new_chunks)
 
 
 class KeywordRetriever:
     """Simple keyword-based retrieval for comparison/hybrid approaches."""
 
+    # Score added when a query term appears in a chunk's function or class name
+    NAME_BOOST = 5.0
+
     @staticmethod
     def search(
         query: str,
         chunks: List[CodeChunk],
-        k: int = 10
+        k: int = 10,
+        index: Optional[BM25Index] = None
     ) -> List[RetrievalResult]:
         """
-        Search for chunks using keyword matching.
+        Search for chunks using BM25 keyword scoring.
 
         Args:
             query: Search query
             chunks: Chunks to search
             k: Number of results to return
+            index: Prebuilt BM25 index over ``chunks`` (built on the fly if None)
 
         Returns:
             List of retrieval results sorted by relevance
         """
-        query_terms = query.lower().split()
-        results = []
-
-        for chunk in chunks:
-            score = 0.0
-            content_lower = chunk.content.lower()
-
-            # Score based on term frequency
-            for term in query_terms:
-                score += content_lower.count(term)
-
-            # Boost score for matching function/class names
-            if chunk.function_name and any(
-                term in chunk.function_name.lower() for term in query_terms
-            ):
-                score += 5.0
-            if chunk.class_name and any(
-                term in chunk.class_name.lower() for term in query_terms
-            ):
-                score += 5.0
-
-            if score > 0:
-                results.append(
-                    RetrievalResult(
-                        chunk=chunk,
-                        relevance_score=score,
-                        retrieval_type="keyword"
-                    )
-                )
-
-        # Sort by score and return top k
-        results.sort(key=lambda x: x.relevance_score, reverse=True)
-        return results[:k]
+        if index is None or index.num_docs != len(chunks):
+            index = BM25Index.from_chunks(chunks)
+
+        return [
+            RetrievalResult(
+                chunk=chunks[idx],
+                relevance_score=score,
+                retrieval_type="keyword"
+            )
+            for idx, score in index.search(query, k, name_boost=KeywordRetriever.NAME_BOOST)
+        ]
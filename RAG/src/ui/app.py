@@ -7,8 +7,11 @@ ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
+import html
+import numpy as np
 import streamlit as st
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
 import os
 from dotenv import load_dotenv
 
@@ -16,6 +19,8 @@ from src.config import settings
 from src.retrieval.semantic_retriever import SemanticRetriever
 from src.ranking.cross_encoder import CrossEncoderReranker
 from src.context.git_context import GitContextManager, ContextualRetriever
+from src.cache.semantic_cache import SemanticCache
+from src.utils.models import CommitContext, RankedResult
 from src.utils.logger import logger
 
 # Load environment variables
@@ -67,26 +72,148 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# Session state initialization
-if "retriever" not in st.session_state:
+# Models and the index are loaded once per process and shared by all
+# sessions and reruns
+@st.cache_resource
+def get_retriever() -> Tuple[Optional[SemanticRetriever], Optional[str]]:
+    """Load the retriever and its index, returning (retriever, error)."""
     try:
-        st.session_state.retriever = SemanticRetriever(
+        retriever = SemanticRetriever(
             model_name="all-MiniLM-L6-v2",
-            index_path=settings.faiss_index_path
+            index_path=settings.faiss_index_path,
+            model_dtype=settings.model_dtype,
+            index_type=settings.faiss_index_type,
+            nprobe=settings.faiss_nprobe,
+            use_gpu=settings.faiss_use_gpu
         )
-        st.session_state.retriever.load_index()
-        st.session_state.index_loaded = True
+        retriever.load_index(mmap=settings.faiss_mmap)
+        return retriever, None
     except Exception as e:
-        st.session_state.index_loaded = False
-        st.session_state.error = str(e)
+        logger.error(f"Failed to load index: {e}")
+        return None, str(e)
+
+
+@st.cache_resource
+def get_reranker() -> CrossEncoderReranker:
+    """Load the cross-encoder reranker."""
+    return CrossEncoderReranker(
+        model_name=settings.reranker_model,
+        batch_size=settings.batch_size,
+        backend=settings.reranker_backend,
+        quantization=settings.reranker_quantization,
+        onnx_path=settings.reranker_onnx_dir,
+        model_dtype=settings.model_dtype
+    )
+
+
+@st.cache_resource
+def get_git_context() -> GitContextManager:
+    """Open the indexed repository for commit context."""
+    return GitContextManager(
+        settings.repo_path,
+        collect_stats=settings.git_collect_stats
+    )
+
 
-if "reranker" not in st.session_state:
-    st.session_state.reranker = CrossEncoderReranker(
-        model_name=settings.reranker_model
+@st.cache_resource
+def get_semantic_cache(_retriever: SemanticRetriever) -> SemanticCache:
+    """Create a semantic cache that embeds through the retriever's encode path."""
+    return SemanticCache(
+        _retriever.embedding_model,
+        threshold=settings.semantic_cache_threshold,
+        ttl=settings.semantic_cache_ttl,
+        max_entries=settings.semantic_cache_max_entries,
+        redis_url=settings.redis_url,
+        index_fingerprint=_retriever.index_fingerprint,
+        encode_fn=_retriever.encode_batch
     )
 
-if "git_context" not in st.session_state:
-    st.session_state.git_context = GitContextManager(settings.repo_path)
+
+retriever, load_error = get_retriever()
+index_loaded = retriever is not None
+git_context = get_git_context()
+semantic_cache = get_semantic_cache(retriever) if index_loaded else None
+
+
+# Recent commits shown per result
+RECENT_COMMITS = 3
+# Characters of each chunk shown in the code preview
+PREVIEW_CHARS = 500
+
+
+@st.cache_data(max_entries=256, ttl=600)
+def cached_file_commits(file_paths: Tuple[str, ...]) -> Dict[str, List[CommitContext]]:
+    """Recent commits for each file, reused across repeated searches."""
+    return git_context.get_files_commits_batch(list(file_paths), RECENT_COMMITS)
+
+
+# Not wrapped in st.cache_data: a cached function can't stream partial
+# rankings to the page, and the semantic cache already serves exact repeats
+# (similarity 1.0) as well as paraphrases
+def search(
+    query: str,
+    k_ret: int,
+    k_rank: int,
+    threshold: float,
+    with_commits: bool = True,
+    on_progress: Optional[Callable[[int, int, List[RankedResult]], None]] = None
+) -> Tuple[int, List[RankedResult], Dict[str, List[CommitContext]]]:
+    """
+    Retrieve and re-rank, reusing results for repeated or paraphrased queries.
+
+    Repeated and paraphrased queries with the same settings are served by
+    the semantic cache. Otherwise candidates are re-ranked in small batches
+    and the ranking so far is passed to ``on_progress`` after each one,
+    while recent commits of candidate files are looked up in the background
+    (only when ``with_commits`` is set).
+
+    Args:
+        query: Search query
+        k_ret: Number of results to retrieve
+        k_rank: Number of re-ranked results to keep
+        threshold: Minimum re-ranker score
+        with_commits: Look up recent commits of the result files
+        on_progress: Called with (results scored, total, ranking so far)
+
+    Returns:
+        Number of retrieved results, the re-ranked results, and recent
+        commits for each of their files (empty without ``with_commits``)
+    """
+    search_kwargs = {"k_ret": k_ret, "k_rank": k_rank, "threshold": threshold}
+    cached = semantic_cache.get(query, **search_kwargs)
+    if cached is not None:
+        if not with_commits:
+            return len(cached), cached, {}
+        paths = tuple(sorted({r.result.chunk.file_path for r in cached}))
+        return len(cached), cached, cached_file_commits(paths)
+
+    results = retriever.search(query, k=k_ret)
+    # The cross-encoder is loaded on the first search that needs it, not
+    # on page load
+    reranker = get_reranker()
+    ranked_results = []
+    commits_future = None
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        if with_commits:
+            # Look up commits in the background while the cross-encoder runs
+            commits_future = executor.submit(
+                git_context.get_files_commits_batch,
+                list({r.chunk.file_path for r in results}),
+                RECENT_COMMITS
+            )
+        for done, total, ranked_results in reranker.rerank_stream(
+            query, results, top_k=k_rank, threshold=threshold
+        ):
+            if on_progress and done < total:
+                on_progress(done, total, ranked_results)
+        commit_map = commits_future.result() if commits_future else {}
+
+    if ranked_results:
+        semantic_cache.put(query, ranked_results, **search_kwargs)
+    shown_paths = {r.result.chunk.file_path for r in ranked_results}
+    commit_map = {path: commit_map[path] for path in shown_paths if path in commit_map}
+    return len(results), ranked_results, commit_map
+
 
 # Header
 col1, col2 = st.columns([3, 1])
@@ -95,7 +222,7 @@ with col1:
     st.markdown("Semantic search for large codebases with intelligent ranking and context")
 
 with col2:
-    if st.session_state.index_loaded:
+    if index_loaded:
         st.success("✓ Index Loaded")
     else:
         st.error("✗ Index Not Loaded")
@@ -140,17 +267,25 @@ with st.sidebar:
     # Index management
     st.subheader("Index Management")
     if st.button("🔄 Reload Index"):
+        if retriever is None:
+            # Retry the failed load instead of serving the cached failure
+            get_retriever.clear()
+            st.rerun()
         try:
-            st.session_state.retriever.load_index()
+            retriever.load_index(mmap=settings.faiss_mmap)
+            cached_file_commits.clear()
+            semantic_cache.clear()
             st.success("Index reloaded successfully")
         except Exception as e:
             st.error(f"Failed to reload index: {e}")
 
 # Main content
-if not st.session_state.index_loaded:
+if not index_loaded:
     st.error(
         "⚠️ FAISS index not loaded. Please build the index first using the CLI tools."
     )
+    if load_error:
+        st.caption(load_error)
     st.stop()
 
 # Search input
@@ -191,28 +326,106 @@ if advanced:
             help="Avoid multiple results from same file"
         )
 
+
+def result_card_html(index: int, ranked_result: RankedResult) -> str:
+    """
+    Build the header, score badges and metadata of one result as HTML.
+
+    Args:
+        index: 1-based result position
+        ranked_result: Result to describe
+
+    Returns:
+        HTML for a single ``st.markdown`` call
+    """
+    chunk = ranked_result.result.chunk
+    parts = [f"<div class='result-card'><h3>Result {index}: {html.escape(chunk.file_path)}</h3>"]
+
+    if show_scores:
+        parts.append(
+            f"<div>"
+            f"<span class='score-badge high-score'>Cross-Encoder: {ranked_result.reranker_score:.3f}</span> "
+            f"<span class='score-badge medium-score'>Semantic: {ranked_result.result.relevance_score:.3f}</span> "
+            f"<span class='score-badge high-score'>Final: {ranked_result.final_score:.3f} "
+            f"({ranked_result.final_score:.2%})</span>"
+            f"</div>"
+        )
+
+    if show_metadata:
+        metadata = [f"<b>Lines</b> {chunk.start_line}-{chunk.end_line}"]
+        if chunk.function_name:
+            metadata.append(f"<b>Function</b> {html.escape(chunk.function_name)}")
+        elif chunk.class_name:
+            metadata.append(f"<b>Class</b> {html.escape(chunk.class_name)}")
+        metadata.append(f"<b>Type</b> {html.escape(chunk.ast_node_type or 'Code')}")
+        parts.append(f"<p>{' &middot; '.join(metadata)}</p>")
+
+    parts.append("</div>")
+    return "".join(parts)
+
+
+def render_results(
+    ranked_results: List[RankedResult],
+    commit_map: Dict[str, List[CommitContext]]
+) -> None:
+    """
+    Render ranked results with the current display options.
+
+    Each result's static details go out as one markdown element; only the
+    code preview and commit list need their own Streamlit elements.
+
+    Args:
+        ranked_results: Results to show, best first
+        commit_map: Recent commits per file path
+    """
+    for i, ranked_result in enumerate(ranked_results, 1):
+        chunk = ranked_result.result.chunk
+        st.markdown(result_card_html(i, ranked_result), unsafe_allow_html=True)
+        st.code(chunk.content[:PREVIEW_CHARS], language=chunk.language)
+        if len(chunk.content) > PREVIEW_CHARS:
+            st.caption(
+                f"Preview shows {PREVIEW_CHARS:,} of {len(chunk.content):,} characters "
+                f"(lines {chunk.start_line}-{chunk.end_line} of {chunk.file_path})"
+            )
+
+        # Commit context
+        if show_commit_context:
+            commits = commit_map.get(chunk.file_path, [])
+            if commits:
+                with st.expander("📝 Recent Commits"):
+                    for commit in commits:
+                        st.write(f"**{commit.commit_hash}** by {commit.author}")
+                        st.caption(commit.message)
+
+
 # Search results
 if search_button and query:
+    progress = st.empty()
+    live_results = st.empty()
+
+    def show_progress(done: int, total: int, partial: List[RankedResult]) -> None:
+        """Show the ranking so far while the remaining candidates are scored."""
+        progress.progress(done / total, text=f"Re-ranked {done}/{total} candidates")
+        with live_results.container():
+            render_results(partial, {})
+
     with st.spinner("Searching codebase..."):
         try:
-            # Retrieve results
-            results = st.session_state.retriever.search(
+            # Retrieve and re-rank results, showing partial rankings as they improve
+            num_retrieved, ranked_results, commit_map = search(
                 query,
-                k=top_k_retrieval,
-                return_scores=True
+                top_k_retrieval,
+                top_k_ranking,
+                reranker_threshold,
+                with_commits=show_commit_context,
+                on_progress=show_progress
             )
+            progress.empty()
+            live_results.empty()
 
-            if not results:
+            if not num_retrieved:
                 st.warning("No results found. Try a different query.")
             else:
-                # Re-rank results
-                ranked_results = st.session_state.reranker.rerank(
-                    query,
-                    results[0],  # First element is results list
-                    top_k=top_k_ranking,
-                    threshold=reranker_threshold
-                )
-
                 if not ranked_results:
                     st.warning("No results met the score threshold.")
                 else:
@@ -223,84 +436,27 @@ if search_button and query:
                     tab1, tab2, tab3 = st.tabs(["Results", "Analysis", "Settings"])
 
                     with tab1:
-                        for i, ranked_result in enumerate(ranked_results, 1):
-                            chunk = ranked_result.result.chunk
-                            scores = ranked_result
-
-                            with st.container():
-                                col1, col2 = st.columns([4, 1] if show_scores else [1, 0])
-
-                                with col1:
-                                    st.markdown(f"### Result {i}: {chunk.file_path}")
-
-                                    # Score badges
-                                    if show_scores:
-                                        score_html = f"""
-                                        <div>
-                                            <span class="score-badge high-score">
-                                                Cross-Encoder: {scores.reranker_score:.3f}
-                                            </span>
-                                            <span class="score-badge medium-score">
-                                                Semantic: {scores.result.relevance_score:.3f}
-                                            </span>
-                                            <span class="score-badge high-score">
-                                                Final: {scores.final_score:.3f}
-                                            </span>
-                                        </div>
-                                        """
-                                        st.markdown(score_html, unsafe_allow_html=True)
-
-                                with col2:
-                                    if show_scores:
-                                        st.metric("Score", f"{scores.final_score:.2%}")
-
-                                # Code content
-                                st.markdown("**Code Preview:**")
-                                st.code(chunk.content[:500], language=chunk.language)
-
-                                # Metadata
-                                if show_metadata:
-                                    col1, col2, col3 = st.columns(3)
-                                    with col1:
-                                        st.metric("Lines", f"{chunk.start_line}-{chunk.end_line}")
-                                    with col2:
-                                        if chunk.function_name:
-                                            st.metric("Function", chunk.function_name)
-                                        elif chunk.class_name:
-                                            st.metric("Class", chunk.class_name)
-                                    with col3:
-                                        st.metric("Type", chunk.ast_node_type or "Code")
-
-                                # Commit context
-                                if show_commit_context:
-                                    commits = st.session_state.git_context.get_file_commits(
-                                        chunk.file_path,
-                                        limit=3
-                                    )
-                                    if commits:
-                                        with st.expander("📝 Recent Commits"):
-                                            for commit in commits:
-                                                st.write(f"**{commit.commit_hash}** by {commit.author}")
-                                                st.caption(commit.message)
-
-                                st.divider()
+                        render_results(ranked_results, commit_map)
 
                     with tab2:
                         st.subheader("Search Analysis")
+                        final_scores = np.fromiter(
+                            (r.final_score for r in ranked_results),
+                            dtype=np.float32,
+                            count=len(ranked_results)
+                        )
                         col1, col2, col3 = st.columns(3)
 
                         with col1:
                             st.metric("Results Returned", len(ranked_results))
                         with col2:
-                            avg_score = sum(r.final_score for r in ranked_results) / len(ranked_results)
-                            st.metric("Average Score", f"{avg_score:.2%}")
+                            st.metric("Average Score", f"{final_scores.mean():.2%}")
                         with col3:
                             st.metric("Query Length", len(query.split()))
 
                         # Score distribution
                         st.subheader("Score Distribution")
-                        scores = [r.final_score for r in ranked_results]
-                        st.bar_chart({"Score": scores})
+                        st.bar_chart({"Score": final_scores})
 
                     with tab3:
                         st.subheader("Current Settings")
@@ -1,10 +1,11 @@
 """Data models for the RAG system."""
 from dataclasses import dataclass, field
 from datetime import datetime
+import sys
 from typing import Optional, List, Dict, Any
 
 
-@dataclass
+@dataclass(slots=True)
 class CodeChunk:
     """Represents a chunk of code with metadata."""
 
@@ -18,13 +19,35 @@ class CodeChunk:
     function_name: Optional[str] = None
     class_name: Optional[str] = None
     metadata: Dict[str, Any] = field(default_factory=dict)
-    created_at: datetime = field(default_factory=datetime.now)
+    # Unix timestamp; ingestion sets one value per file
+    created_at: Optional[float] = None
+
+    def __post_init__(self):
+        self._intern_strings()
 
     def __hash__(self):
         return hash(self.chunk_id)
 
-
-@dataclass
+    def _intern_strings(self):
+        # Chunks of one file share a single copy of these repeated strings
+        self.file_path = sys.intern(self.file_path)
+        self.language = sys.intern(self.language)
+        if self.ast_node_type:
+            self.ast_node_type = sys.intern(self.ast_node_type)
+
+    def __setstate__(self, state):
+        # Accept both slot state and the __dict__ state of chunks pickled
+        # before CodeChunk used slots
+        if isinstance(state, tuple):
+            state = {**(state[0] or {}), **state[1]}
+        if isinstance(state.get("created_at"), datetime):
+            state["created_at"] = state["created_at"].timestamp()
+        for name, value in state.items():
+            setattr(self, name, value)
+        self._intern_strings()
+
+
+@dataclass(slots=True)
 class RetrievalResult:
     """Represents a retrieved code chunk with relevance score."""
 
@@ -33,7 +56,7 @@ class RetrievalResult:
     retrieval_type: str = "semantic"  # semantic, keyword, hybrid
 
 
-@dataclass
+@dataclass(slots=True)
 class RankedResult:
     """Represents a re-ranked retrieval result."""
 
@@ -42,7 +65,7 @@ class RankedResult:
     final_score: float
 
 
-@dataclass
+@dataclass(slots=True)
 class CommitContext:
     """Represents commit context for a code chunk."""
 
@@ -55,7 +78,7 @@ class CommitContext:
     deletions: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class ContextualResult:
     """Represents a result with full context."""
 
@@ -65,7 +88,7 @@ class ContextualResult:
     expanded_queries: List[str] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class QueryExpansionResult:
     """Represents expanded queries from the original query."""
 
@@ -0,0 +1,55 @@
+"""Model precision utilities for the RAG system."""
+from pathlib import Path
+
+import torch
+
+from src.utils.logger import logger
+
+
+def _cpu_supports_bf16() -> bool:
+    """Check whether the CPU has native bfloat16 instructions."""
+    try:
+        cpuinfo = Path("/proc/cpuinfo").read_text()
+    except OSError:
+        return False
+    return "avx512_bf16" in cpuinfo or "amx_bf16" in cpuinfo
+
+
+def resolve_model_dtype(name: str) -> torch.dtype:
+    """
+    Resolve a configured dtype name to a torch dtype supported on this machine.
+
+    Args:
+        name: Dtype name (float32, bfloat16, float16)
+
+    Returns:
+        The requested dtype, or torch.float32 if it is unsupported here
+    """
+    dtype = getattr(torch, name, None)
+    if not isinstance(dtype, torch.dtype):
+        logger.warning(f"Unknown model dtype '{name}', using float32")
+        return torch.float32
+
+    cuda_available = torch.cuda.is_available()
+    if dtype == torch.bfloat16:
+        if not ((cuda_available and torch.cuda.is_bf16_supported()) or _cpu_supports_bf16()):
+            logger.info("bfloat16 not supported on this device, using float32")
+            return torch.float32
+    elif dtype == torch.float16 and not cuda_available:
+        logger.info("float16 requires CUDA, using float32")
+        return torch.float32
+
+    return dtype
+
+
+def upcast_token_embeddings(module, args):
+    """Forward pre-hook casting token embeddings to float32 before pooling."""
+    features = args[0]
+    features["token_embeddings"] = features["token_embeddings"].float()
+    return (features,) + tuple(args[1:])
+
+
+def upcast_logits(module, args, output):
+    """Forward hook casting classifier logits to float32."""
+    output.logits = output.logits.float()
+    return output
@@ -3,7 +3,12 @@ import pytest
 from pathlib import Path
 from src.utils.models import CodeChunk, RetrievalResult
 from src.ingestion.code_ingestion import CodeChunker, ASTAnalyzer
-from src.retrieval.semantic_retriever import KeywordRetriever
+from src.retrieval.semantic_retriever import KeywordRetriever, SemanticRetriever
+from src.retrieval.bm25 import BM25Index, tokenize
+from src.retrieval.chunk_store import ChunkStore, append_chunks, write_chunks
+from src.cache.semantic_cache import SemanticCache
+from src.query_expansion.llm_expander import QueryExpander
+from src.ranking.cross_encoder import CrossEncoderReranker
 
 
 class TestCodeChunker:
@@ -60,9 +65,162 @@ class TestKeywordRetriever:
 
         results = KeywordRetriever.search("authentication", chunks, k=5)
 
-        assert len(results) > 0
-        assert results[0].chunk.chunk_id == "1"
-        assert results[0].relevance_score > results[1].relevance_score
+        # "authentication" stems to match authenticate_user; the unrelated
+        # chunk scores zero and is left out
+        assert [r.chunk.chunk_id for r in results] == ["1"]
+        assert results[0].relevance_score > 0
+
+
+class TestBM25Index:
+    """Test BM25 keyword index."""
+
+    def test_tokenize_splits_identifiers(self):
+        """Test identifiers are kept whole and split into parts."""
+        tokens = tokenize("def authenticateUser(user_name):")
+        assert "authenticateuser" in tokens
+        assert "authenticate" in tokens
+        assert "user_name" in tokens
+        assert "name" in tokens
+
+    def test_bm25_search(self):
+        """Test BM25 ranks the matching chunk first."""
+        index = BM25Index()
+        index.build([
+            "def authenticate_user(username, password):\n    return verify(username, password)",
+            "def process_data(data):\n    return transform(data)",
+            "def verify(username, password):\n    return True"
+        ])
+
+        results = index.search("authenticate user", k=2)
+
+        assert results[0][0] == 0
+        assert all(score > 0 for _, score in results)
+        assert index.search("nonexistent", k=2) == []
+
+    def test_stemmed_match(self):
+        """Test inflected query terms match their stem."""
+        index = BM25Index()
+        index.build([
+            "def authenticate_user(username, password):",
+            "def parse_config(path):"
+        ])
+
+        assert [doc for doc, _ in index.search("authentication", k=2)] == [0]
+        assert [doc for doc, _ in index.search("parsing", k=2)] == [1]
+
+    def test_name_boost(self):
+        """Test function name matches are boosted over body-only matches."""
+        chunks = [
+            CodeChunk("1", "return session.token", "a.py", 1, 2, "py", function_name="helper"),
+            CodeChunk("2", "return 1", "b.py", 1, 2, "py", function_name="get_token"),
+        ]
+
+        results = KeywordRetriever.search("token", chunks, k=2)
+
+        assert [r.chunk.chunk_id for r in results] == ["2", "1"]
+        assert results[0].relevance_score == KeywordRetriever.NAME_BOOST
+
+    def test_name_boost_per_kind(self):
+        """Test function and class name substring matches are boosted separately."""
+        chunks = [
+            CodeChunk("1", "pass", "a.py", 1, 2, "py", function_name="authenticate"),
+            CodeChunk("2", "pass", "b.py", 1, 2, "py", function_name="authenticate", class_name="AuthService"),
+        ]
+
+        results = KeywordRetriever.search("auth", chunks, k=2)
+
+        assert [r.chunk.chunk_id for r in results] == ["2", "1"]
+        assert results[0].relevance_score == 2 * KeywordRetriever.NAME_BOOST
+        assert results[1].relevance_score == KeywordRetriever.NAME_BOOST
+
+
+class TestChunkStore:
+    """Test the on-disk chunk store."""
+
+    def test_round_trip(self, tmp_path):
+        """Test chunks read back lazily match what was written."""
+        chunks = [
+            CodeChunk(
+                chunk_id=str(i),
+                file_path="module.py",
+                start_line=i,
+                end_line=i + 1,
+                content=f"def func_{i}():\n    return {i}",
+                language="python",
+                function_name=f"func_{i}",
+                metadata={"complexity": i}
+            )
+            for i in range(3)
+        ]
+        write_chunks(tmp_path, chunks)
+
+        store = ChunkStore(tmp_path)
+        assert len(store) == 3
+        assert store[1] == chunks[1]
+        assert store[-1].content == chunks[2].content
+        assert store[0].created_at == chunks[0].created_at
+        assert list(store) == chunks
+        assert store.file_paths.tolist() == ["module.py"]
+        assert store.file_path(2) == "module.py"
+        assert store.start_lines.tolist() == [0, 1, 2]
+        store.close()
+
+    def test_append(self, tmp_path):
+        """Test appended chunks extend the store and its columns."""
+        chunks = [
+            CodeChunk(str(i), f"x = {i}", f"{name}.py", i, i, "python")
+            for i, name in enumerate(["b", "c", "a", "b"])
+        ]
+        write_chunks(tmp_path, chunks[:2])
+        store = ChunkStore(tmp_path)
+        append_chunks(store, chunks[2:])
+        store.close()
+
+        store = ChunkStore(tmp_path)
+        assert list(store) == chunks
+        assert store.file_paths.tolist() == ["a.py", "b.py", "c.py"]
+        assert [store.file_path(i) for i in range(4)] == ["b.py", "c.py", "a.py", "b.py"]
+        store.close()
+
+
+class TestSemanticRetriever:
+    """Test index updates."""
+
+    class FakeModel:
+        """Embeds texts by their length, without loading a model."""
+
+        def __init__(self, model_name):
+            pass
+
+        def get_sentence_embedding_dimension(self):
+            return 4
+
+        def encode(self, texts, normalize_embeddings=False, **kwargs):
+            import numpy as np
+            embeddings = np.array([[len(text), 1.0, 0.0, 0.0] for text in texts], dtype=np.float32)
+            if normalize_embeddings:
+                embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+            return embeddings
+
+    def test_update_commit_persists(self, tmp_path, monkeypatch):
+        """Test a small committed update is saved without waiting for the timer."""
+        monkeypatch.setattr("src.retrieval.semantic_retriever.SentenceTransformer", self.FakeModel)
+        chunks = [
+            CodeChunk(str(i), f"x = {i}", f"{name}.py", i, i, "python")
+            for i, name in enumerate(["a", "b", "c"])
+        ]
+        retriever = SemanticRetriever(index_path=tmp_path, commit_interval=3600, use_gpu=False)
+        retriever.build_index(chunks[:2])
+        retriever.save_index()
+
+        retriever.update_index(chunks[2:], commit=True)
+        assert retriever._commit_timer is None
+
+        reloaded = SemanticRetriever(index_path=tmp_path, use_gpu=False)
+        reloaded.load_index()
+        assert len(reloaded.chunk_map) == 3
+        assert reloaded.faiss_index.ntotal == 3
+        assert reloaded.chunk_map[2] == chunks[2]
 
 
 class TestASTAnalyzer:
@@ -96,5 +254,156 @@ class DataProcessor:
         assert "FunctionDef" in node_types or "ClassDef" in node_types
 
 
+class TestSemanticCache:
+    """Test semantic response caching."""
+
+    class FakeEmbedder:
+        """Embeds queries by first word so paraphrases share a vector."""
+
+        def get_sentence_embedding_dimension(self):
+            return 2
+
+        def encode(self, texts, convert_to_numpy=True, normalize_embeddings=True):
+            import numpy as np
+            return np.array([
+                [1.0, 0.0] if text.split()[0] == "auth" else [0.0, 1.0]
+                for text in texts
+            ], dtype=np.float32)
+
+    def test_cache_hit_and_miss(self):
+        """Test similar queries hit and different parameters miss."""
+        cache = SemanticCache(self.FakeEmbedder(), threshold=0.95)
+
+        assert cache.get("auth middleware", top_k=5) is None
+        cache.put("auth middleware", ["cached"], top_k=5)
+
+        assert cache.get("auth handlers", top_k=5) == ["cached"]
+        assert cache.get("auth handlers", top_k=3) is None
+        assert cache.get("database queries", top_k=5) is None
+
+    def test_miss_embeds_once_and_index_change_invalidates(self):
+        """Test a miss followed by put embeds once and a new index misses."""
+        embedder = self.FakeEmbedder()
+        calls = []
+        fingerprint = ["index-1"]
+        cache = SemanticCache(
+            embedder,
+            index_fingerprint=lambda: fingerprint[0],
+            encode_fn=lambda texts: calls.append(texts) or embedder.encode(texts)
+        )
+
+        cache.put("auth middleware", ["old"])
+        assert cache.get("auth handlers") == ["old"]
+        assert cache.get("database queries") is None
+        cache.put("database queries", ["db"])
+        assert len(calls) == 3
+
+        fingerprint[0] = "index-2"
+        assert cache.get("auth handlers") is None
+
+    def test_cache_eviction(self):
+        """Test LRU eviction beyond max entries."""
+        cache = SemanticCache(self.FakeEmbedder(), max_entries=1)
+        cache.put("auth middleware", ["first"])
+        cache.put("database queries", ["second"])
+
+        assert cache.get("auth middleware") is None
+        assert cache.get("database queries") == ["second"]
+
+
+class TestQueryExpander:
+    """Test query expansion caching."""
+
+    class FakeLLMClient:
+        """Counts completion calls and returns fixed expansions."""
+
+        def __init__(self):
+            from types import SimpleNamespace
+            self.calls = 0
+            self.chat = SimpleNamespace(completions=self)
+
+        def create(self, **kwargs):
+            from types import SimpleNamespace
+            self.calls += 1
+            message = SimpleNamespace(content="login handler\nsession validation")
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    def test_expansions_are_cached(self):
+        """Test repeated queries skip the LLM call."""
+        client = self.FakeLLMClient()
+        expander = QueryExpander(client)
+
+        first = expander.expand_with_strategy("User auth", "related_concepts")
+        second = expander.expand_with_strategy(" user AUTH ", "related_concepts")
+        assert first == second == ["login handler", "session validation"]
+        assert client.calls == 1
+
+        expander.expand_with_strategy("user auth", "synonym_expansion")
+        assert client.calls == 2
+
+        result = expander.expand_query("user auth", expansion_count=1)
+        assert expander.expand_query("user auth", expansion_count=1).expanded_queries == result.expanded_queries
+        assert client.calls == 3
+
+
+class TestCrossEncoderReranker:
+    """Test cross-encoder score caching."""
+
+    class FakeModel:
+        """Scores pairs by passage length and counts scored pairs."""
+
+        def __init__(self):
+            self.scored = 0
+
+        def predict(self, pairs, batch_size=32):
+            import numpy as np
+            self.scored += len(pairs)
+            return np.array([len(passage) for _, passage in pairs], dtype=np.float32)
+
+    def make_results(self):
+        return [
+            RetrievalResult(CodeChunk(str(i), "x" * (i + 1), "a.py", 1, 2, "python"), 0.5)
+            for i in range(3)
+        ]
+
+    def test_scores_are_cached(self, monkeypatch):
+        """Test repeated pairs skip the model and literal queries skip scoring."""
+        model = self.FakeModel()
+        monkeypatch.setattr(CrossEncoderReranker, "_load_model", lambda self: model)
+        reranker = CrossEncoderReranker(backend="onnx")
+        results = self.make_results()
+
+        first = reranker.rerank("parse config", results, top_k=2)
+        assert [r.result.chunk.chunk_id for r in first] == ["2", "1"]
+        assert model.scored == 3
+
+        reranker.rerank("parse config", results, top_k=2)
+        assert model.scored == 3
+
+        reranker.rerank("parse config", results, top_k=2, no_cache=True)
+        assert model.scored == 6
+
+        literal = reranker.rerank("config.py", results, top_k=2)
+        assert [r.result.chunk.chunk_id for r in literal] == ["0", "1"]
+        assert model.scored == 6
+
+        dotted = reranker.rerank("settings.batch_size", results, top_k=2)
+        assert [r.result.chunk.chunk_id for r in dotted] == ["2", "1"]
+        assert model.scored == 9
+
+    def test_rerank_stream(self, monkeypatch):
+        """Test streamed rankings grow per batch and end with the full ranking."""
+        model = self.FakeModel()
+        monkeypatch.setattr(CrossEncoderReranker, "_load_model", lambda self: model)
+        reranker = CrossEncoderReranker(backend="onnx")
+        results = self.make_results()
+
+        steps = list(reranker.rerank_stream("parse config", results, top_k=2, batch_size=2))
+
+        assert [(done, total) for done, total, _ in steps] == [(2, 3), (3, 3)]
+        assert [r.result.chunk.chunk_id for r in steps[0][2]] == ["1", "0"]
+        assert steps[-1][2] == reranker.rerank("parse config", results, top_k=2)
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])